@@ -0,0 +1,146 @@
+from __future__ import division, print_function
+
+import os
+import random
+import tempfile
+import time
+from array import array
+from multiprocessing import Process, Queue
+from queue import Empty
+
+from solution import counter_solution, file_solution, numpy_solution, solution, stream_solution
+
+
+def write_ids(path, count, distinct, chunk_size=1 << 20):
+    """`count` random int32 task ids out of `distinct`, written chunk by chunk"""
+    rnd = random.Random(0)
+    with open(path, 'wb') as f:
+        for start in range(0, count, chunk_size):
+            array('i', [rnd.randrange(distinct) for _ in range(min(chunk_size, count - start))]).tofile(f)
+
+
+def measured(queue, f, args):
+    import resource
+    import traceback
+
+    try:
+        start = time.time()
+        result = f(*args)
+        elapsed = time.time() - start
+    except Exception:
+        queue.put(traceback.format_exc())
+        return
+    usage = [resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    queue.put((hash(tuple(result)), elapsed, max(usage)))
+
+
+def in_process(f, *args):
+    """
+    (hash of the result, seconds, peak RSS in kB of the process or any of its workers) of f(*args) in a fresh process.
+    Raises RuntimeError if f raises or the process dies (e.g. killed for memory) before reporting.
+    """
+    queue = Queue()
+    process = Process(target=measured, args=(queue, f, args))
+    process.start()
+    try:
+        while True:
+            try:
+                result = queue.get(timeout=1)
+                break
+            except Empty:
+                if not process.is_alive():
+                    # it may have reported right before exiting
+                    try:
+                        result = queue.get(timeout=1)
+                        break
+                    except Empty:
+                        raise RuntimeError('{} exited with code {} without a result'.format(
+                            f.__name__, process.exitcode
+                        ))
+    finally:
+        process.join()
+    if not isinstance(result, tuple):
+        raise RuntimeError('{} failed:\n{}'.format(f.__name__, result))
+    return result
+
+
+def load_solution(path, n):
+    # the whole file as a list, as solution needs it
+    values = array('i')
+    with open(path, 'rb') as f:
+        values.frombytes(f.read())
+    return solution(values.tolist(), n)
+
+
+def file_stream_solution(path, n, processes):
+    # chunks read in the parent and sent to the pool
+    def chunks():
+        with open(path, 'rb') as f:
+            while True:
+                chunk = array('i')
+                chunk.frombytes(f.read(1 << 22))
+                if not chunk:
+                    return
+                yield chunk
+
+    return stream_solution(chunks(), n, processes)
+
+
+def run(count=2 * 10 ** 7, distinct=10 ** 5, n=200, workers=(None, 1, 2, 4)):
+    """
+    throughput and peak RSS of solution on the whole file loaded as a list, against stream_solution
+    (chunks read by the parent) and file_solution (chunks mapped by the workers) per worker count
+    """
+    path = os.path.join(tempfile.gettempdir(), 'problem_1_ids.bin')
+    write_ids(path, count, distinct)
+    try:
+        print('{} ids out of {}, n = {}'.format(count, distinct, n))
+        print('{:>8} {:>8} {:>10} {:>14} {:>10}'.format('method', 'workers', 'time', 'ids/s', 'peak RSS'))
+        rows = [('load', None, load_solution, (path, n))]
+        rows += [('stream', p, file_stream_solution, (path, n, p)) for p in workers]
+        rows += [('file', p, file_solution, (path, n, 'i', p)) for p in workers]
+        results = set()
+        for name, processes, f, args in rows:
+            digest, elapsed, peak = in_process(f, *args)
+            results.add(digest)
+            print('{:>8} {:>8} {:>9.2f}s {:>14.0f} {:>8.0f}MB'.format(
+                name, processes or '-', elapsed, count / elapsed, peak / 1024
+            ))
+        assert len(results) == 1
+    finally:
+        os.remove(path)
+
+
+def timed(f, *args):
+    start = time.time()
+    result = f(*args)
+    return result, time.time() - start
+
+
+def run_numpy(sizes=(10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7), max_counter=10 ** 7, n=1):
+    """
+    counter_solution against numpy_solution on int32 numpy arrays, for ids out of a range of a tenth of the
+    values (bincount) and out of 2^31 (unique), and what solution dispatches to for array('i') input
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    print('{:>10} {:>8} {:>10} {:>10} {:>10}'.format('values', 'range', 'counter', 'numpy', 'solution'))
+    for size in sizes:
+        for name, spread in (('small', max(1, size // 10)), ('large', 2 ** 31 - 1)):
+            values = rng.integers(0, spread, size, dtype=np.int32)
+            result, t_numpy = timed(numpy_solution, values, n)
+            row = ['-', '{:.4f}s'.format(t_numpy), '-']
+            if size <= max_counter:
+                expected, t_counter = timed(counter_solution, values.tolist(), n)
+                assert result == expected
+                ids = array('i', values.tobytes())
+                dispatched, t_solution = timed(solution, ids, n)
+                assert dispatched == expected
+                row[0], row[2] = '{:.4f}s'.format(t_counter), '{:.4f}s'.format(t_solution)
+            print('{:>10} {:>8} {:>10} {:>10} {:>10}'.format(size, name, *row))
+
+
+if __name__ == '__main__':
+    run()
+    run_numpy()
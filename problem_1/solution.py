@@ -1,10 +1,181 @@
+import mmap
+import os
+import random
+import tempfile
+from array import array
 from collections import Counter
+from itertools import islice
+from multiprocessing import Pool
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# below this many values, Counter beats the setup cost of numpy
+NUMPY_THRESHOLD = 1 << 10
 
 
 def solution(data, n):
+    """
+    counter_solution, or numpy_solution for integer arrays (array.array or numpy) of at least NUMPY_THRESHOLD values
+    """
+    if np is not None and len_or_zero(data) >= NUMPY_THRESHOLD:
+        if isinstance(data, array) and data.typecode in 'bBhHiIlLqQ' or \
+                isinstance(data, np.ndarray) and data.ndim == 1 and data.dtype.kind in 'iu':
+            return numpy_solution(data, n)
+    return counter_solution(data, n)
+
+
+def len_or_zero(data):
+    try:
+        return len(data)
+    except TypeError:
+        return 0
+
+
+def counter_solution(data, n):
     counted = Counter(data)
     return [k for k, v in counted.items() if v <= n]
 
 
+def numpy_solution(data, n):
+    """
+    counter_solution for integer buffers with numpy. Per distinct value its count and first index come from
+    - np.bincount and np.minimum.at, if the values span less than twice their number
+    - one sort of (value - min) << 32 | index, if values and indices fit into 32 bits each:
+      equal values end up next to each other, the first one with the smallest index
+    - np.unique otherwise
+    The first indices of the values occurring at most n times then mark the positions to keep,
+    i.e. the result is in first occurrence order without sorting by index.
+    """
+    if np is None:
+        raise ImportError('numpy_solution requires numpy')
+    values = np.asarray(data)
+    size = len(values)
+    if not size:
+        return []
+    # differences to the minimum wrap around for signed values, but are right once read as unsigned
+    shifted = (values - values.min()).view('u{}'.format(values.dtype.itemsize))
+    span = int(shifted.max()) + 1
+    if span <= 2 * size:
+        shifted = shifted.astype(np.intp)
+        counts = np.bincount(shifted)
+        first = np.full(span, size, dtype=np.intp)
+        np.minimum.at(first, shifted, np.arange(size, dtype=np.intp))
+        first = first[(counts > 0) & (counts <= n)]
+    elif span <= 1 << 32 and size <= 1 << 32:
+        composite = (shifted.astype(np.uint64) << np.uint64(32)) | np.arange(size, dtype=np.uint64)
+        composite.sort()
+        keys = composite >> np.uint64(32)
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        counts = np.diff(np.append(starts, size))
+        first = composite[starts[counts <= n]] & np.uint64(0xFFFFFFFF)
+    else:
+        _, first, counts = np.unique(values, return_index=True, return_counts=True)
+        first = first[counts <= n]
+    keep = np.zeros(size, dtype=bool)
+    keep[first.astype(np.intp)] = True
+    return values[keep].tolist()
+
+
+def count_file_chunk(task):
+    """Counter of values [start, stop) of a (path, typecode, start, stop) binary file, read by the worker itself"""
+    path, typecode, start, stop = task
+    itemsize = array(typecode).itemsize
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            values = array(typecode, mapped[start * itemsize:stop * itemsize])
+        finally:
+            mapped.close()
+    return Counter(values)
+
+
+def merge(results, n):
+    """
+    merge adds up the counts of consecutive chunks in order and returns the keys occurring at most n times.
+    A Counter keeps its keys in the order they were first counted (as in solution), so the keys of a chunk
+    are in first occurrence order and updating with the chunks in order keeps them that way across chunks,
+    i.e. the first index of every key is kept track of without storing it.
+    """
+    counted = Counter()
+    for partial in results:
+        counted.update(partial)
+    return [k for k, v in counted.items() if v <= n]
+
+
+def chunked(data, chunk_size=1 << 16):
+    """chunked yields lists of `chunk_size` consecutive values of any iterable"""
+    data = iter(data)
+    return iter(lambda: list(islice(data, chunk_size)), [])
+
+
+def stream_solution(chunks, n, processes=None):
+    """
+    stream_solution is solution over a sequence of chunks (lists, arrays, ...) of the input in order,
+    e.g. from chunked, keeping only one chunk and the counts of the distinct keys in memory.
+
+    arguments:
+    processes -- count the chunks in a pool of that many processes, merged in order as they come back
+    """
+    if not processes:
+        return merge((Counter(chunk) for chunk in chunks), n)
+    pool = Pool(processes)
+    try:
+        return merge(pool.imap(Counter, chunks), n)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def file_solution(path, n, typecode='i', processes=None, chunk_size=1 << 20):
+    """
+    file_solution is solution over a binary file of native `typecode` values (int32 by default).
+    Chunks are memory-mapped and decoded by the counting processes themselves, so only
+    (start, stop) ranges travel to the pool and the file never has to fit in memory.
+    """
+    itemsize = array(typecode).itemsize
+    count = os.path.getsize(path) // itemsize
+    tasks = [(path, typecode, start, min(start + chunk_size, count)) for start in range(0, count, chunk_size)]
+    if not processes:
+        return merge((count_file_chunk(task) for task in tasks), n)
+    pool = Pool(processes)
+    try:
+        return merge(pool.imap(count_file_chunk, tasks), n)
+    finally:
+        pool.close()
+        pool.join()
+
+
 assert solution([1, 2, 3], 0) == []
 assert solution([1, 2, 2, 3, 3, 3, 4, 5, 5], 1) == [1, 4]
+
+data = [7, 5, 3, 5, 7, 1, 9, 3, 3, 2, 8, 7, 2, 6]
+for n in range(4):
+    expected = solution(data, n)
+    for chunk_size in (1, 3, 5, len(data)):
+        assert stream_solution(chunked(data, chunk_size), n) == expected
+        assert stream_solution(chunked(array('i', data), chunk_size), n) == expected
+
+handle, path = tempfile.mkstemp()
+try:
+    with os.fdopen(handle, 'wb') as f:
+        array('i', data).tofile(f)
+    for n in range(4):
+        for chunk_size in (1, 3, len(data)):
+            assert file_solution(path, n, chunk_size=chunk_size) == solution(data, n)
+finally:
+    os.remove(path)
+
+if np is not None:
+    rnd = random.Random(0)
+    for size, spread in ((2000, 100), (2000, 10 ** 6), (5000, 3000), (2000, 2 ** 31 - 1), (2000, 2 ** 40)):
+        data = [rnd.randint(-spread, spread) for _ in range(size)]
+        for n in (0, 1, 2, 5, 10 ** 6):
+            expected = counter_solution(data, n)
+            assert numpy_solution(data, n) == solution(np.array(data, dtype=np.int64), n) == expected
+            if spread < 2 ** 31:
+                assert solution(array('i', data), n) == expected
+    data = [2 ** 64 - 1, 2 ** 64 - 3, 2 ** 64 - 1, 5, 2 ** 63]
+    assert numpy_solution(np.array(data, dtype=np.uint64), 1) == counter_solution(data, 1) == [2 ** 64 - 3, 5, 2 ** 63]
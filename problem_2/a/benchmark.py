@@ -0,0 +1,86 @@
+from __future__ import division, print_function
+
+import os
+import random
+import resource
+import tempfile
+import time
+from array import array
+
+from solution import PrefixIndex, batch_solution, mmap_values, scan_solution, solution, stream_solution
+
+
+def timed(f, *args):
+    start = time.time()
+    result = f(*args)
+    return result, time.time() - start
+
+
+def run(sizes=(10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7), max_scan=10 ** 5):
+    """
+    even values and an odd target, i.e. without a matching window (worst case: every engine scans
+    the whole list), scan_solution copies the remaining list for every start and is only run up to `max_scan`.
+    """
+    rnd = random.Random(0)
+    t = 1001
+    print('{:>9} {:>10} {:>10} {:>10}'.format('n', 'scan', 'window', 'prefix'))
+    for n in sizes:
+        l = [2 * rnd.randint(1, 49) for _ in range(n)]
+        row = ['-']
+        if n <= max_scan:
+            expected, elapsed = timed(scan_solution, l, t)
+            row = ['{:.4f}s'.format(elapsed)]
+        result, elapsed = timed(solution, l, t)
+        assert result == [-1, -1]
+        row.append('{:.4f}s'.format(elapsed))
+        _, elapsed = timed(lambda: PrefixIndex(l).find(t))
+        row.append('{:.4f}s'.format(elapsed))
+        print('{:>9} {:>10} {:>10} {:>10}'.format(n, *row))
+
+
+def run_batch(n=10 ** 6, targets=1000):
+    rnd = random.Random(1)
+    l = [rnd.randint(1, 99) for _ in range(n)]
+    ts = [rnd.randint(1, 10 ** 4) for _ in range(targets)]
+
+    batch, t_batch = timed(batch_solution, l, ts)
+    single, t_single = timed(lambda: [solution(l, t) for t in ts])
+    assert batch == single
+    print('{} targets on {} values: batch {:.3f}s, one solution call per target {:.3f}s'.format(
+        targets, n, t_batch, t_single
+    ))
+
+
+def write_int32(path, gigabytes, t, chunk_size=1 << 20):
+    """even int32 values, followed by a single `t` (odd), i.e. the only match is the very last value"""
+    rnd = random.Random(2)
+    chunk = array('i', [2 * rnd.randint(1, 49) for _ in range(chunk_size)])
+    chunks = int(gigabytes * 2 ** 30) // (chunk.itemsize * chunk_size)
+    with open(path, 'wb') as f:
+        for _ in range(chunks):
+            chunk.tofile(f)
+        array('i', [t]).tofile(f)
+    return chunks * chunk_size
+
+
+def run_stream(gigabytes=2, t=1001):
+    """streams a `gigabytes` large int32 file through stream_solution via mmap_values"""
+    path = os.path.join(tempfile.mkdtemp(), 'values.int32')
+    try:
+        n = write_int32(path, gigabytes, t)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result, elapsed = timed(stream_solution, mmap_values(path), t)
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        assert result == [n, n]
+        print('{:.1f}GB ({} values): {:.1f}s ({:.1f}M values/s), max RSS {:.1f}MB -> {:.1f}MB'.format(
+            gigabytes, n + 1, elapsed, (n + 1) / elapsed / 1e6, rss_before / 1024, rss_after / 1024
+        ))
+    finally:
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+
+
+if __name__ == '__main__':
+    run()
+    run_batch()
+    run_stream()
@@ -1,4 +1,12 @@
-def solution(l, t):
+import mmap
+import os
+from array import array
+from bisect import bisect_right
+from collections import deque
+from itertools import islice
+
+
+def scan_solution(l, t):
     # l: [int in (1,100)] not [] (1 to 100 elements)
     # t: 250 > int > 0
     # solution verifies if there sequence within l such that sum(l[start:end]) == t
@@ -29,6 +37,133 @@ def solution(l, t):
         return [-1, -1]
 
 
+def sliding_window(l, t):
+    """
+    sliding_window solves scan_solution in O(n) for positive values only.
+
+    As all values are positive, the window sum grows with its end and shrinks with its start,
+    i.e. for every end there is at most one start and the first end found also has
+    the earliest start.
+    """
+    start = 0
+    rolling_sum = 0
+    for end, val in enumerate(l):
+        rolling_sum += val
+        while rolling_sum > t and start < end:
+            rolling_sum -= l[start]
+            start += 1
+        if rolling_sum == t:
+            return [start, end]
+    return [-1, -1]
+
+
+class PrefixIndex(object):
+    """
+    PrefixIndex holds the prefix sums of `l` (prefix[i] = sum(l[:i])) and, for every prefix sum,
+    the positions it occurs at. sum(l[start:end + 1]) == t  <=>  prefix[end + 1] == prefix[start] + t,
+    so the earliest [start, end] is found by one pass over the starts with a hash lookup each.
+    Works for any integers (incl. zeros and negatives), and for any number of targets `t`.
+    """
+
+    def __init__(self, l):
+        self.prefix = [0]
+        for val in l:
+            self.prefix.append(self.prefix[-1] + val)
+        self.positions = {}
+        for i, p in enumerate(self.prefix):
+            self.positions.setdefault(p, []).append(i)
+        # prefix sums of positive values are strictly increasing, i.e. every position is unique
+        self.increasing = all(len(v) == 1 for v in self.positions.values())
+
+    def find(self, t):
+        positions = self.positions
+        for start, p in enumerate(islice(self.prefix, len(self.prefix) - 1)):
+            ends = positions.get(p + t)
+            if ends is None:
+                continue
+            if self.increasing:
+                if ends[0] > start:
+                    return [start, ends[0] - 1]
+                continue
+            # first end after start
+            k = bisect_right(ends, start)
+            if k < len(ends):
+                return [start, ends[k] - 1]
+        return [-1, -1]
+
+
+def batch_solution(l, targets):
+    """batch_solution answers solution(l, t) for every t in targets from one PrefixIndex"""
+    index = PrefixIndex(l)
+    return [index.find(t) for t in targets]
+
+
+def stream_matches(values, t):
+    """
+    stream_matches lazily yields every [start, end] with sum(values[start:end + 1]) == t,
+    in order, for any iterable of positive ints (e.g. mmap_values).
+
+    Only the current window is kept (in a deque), see sliding_window.
+    """
+    window = deque()
+    start = 0
+    rolling_sum = 0
+    for end, val in enumerate(values):
+        if val <= 0:
+            raise ValueError('Streaming requires positive values, got {} at {}'.format(val, end))
+        window.append(val)
+        rolling_sum += val
+        while rolling_sum > t and window:
+            rolling_sum -= window.popleft()
+            start += 1
+        if rolling_sum == t and window:
+            yield [start, end]
+
+
+def stream_solution(values, t):
+    """stream_solution returns the first match of stream_matches as soon as it is found"""
+    return next(stream_matches(values, t), [-1, -1])
+
+
+def mmap_values(path, typecode='i', chunk_size=1 << 16):
+    """
+    mmap_values yields the values of a binary file of native `typecode` values (int32 by default),
+    memory-mapped and decoded `chunk_size` values at a time, i.e. in constant memory.
+    """
+    itemsize = array(typecode).itemsize
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < itemsize:
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            step = chunk_size * itemsize
+            end = size - size % itemsize
+            for offset in range(0, end, step):
+                chunk = array(typecode, mapped[offset:min(offset + step, end)])
+                if hasattr(mapped, 'madvise') and offset % mmap.PAGESIZE == 0:
+                    # the chunk has been copied, the mapped pages do not need to stay resident
+                    mapped.madvise(mmap.MADV_DONTNEED, offset, len(chunk) * itemsize)
+                for val in chunk:
+                    yield val
+        finally:
+            mapped.close()
+
+
+def solution(l, t):
+    # l: [int] (any length)
+    # t: int
+    # returns the earliest [start, end] with sum(l[start:end + 1]) == t, [-1, -1] if there is none
+    if l and min(l) > 0:
+        return sliding_window(l, t)
+    return PrefixIndex(l).find(t)
+
+
 assert solution([1, 2, 3, 4], 15) == [-1, -1]
 assert solution([4, 3, 10, 2, 8], 12) == [2, 3]
 assert solution([4, 3, 5, 7, 8], 12) == [0, 2]
+assert solution([1, 0, -1, 3, 2], 2) == [1, 3]
+assert solution([2, -1, 1, 0, 1], 1) == [0, 1]
+assert batch_solution([4, 3, 10, 2, 8], [12, 15, 1]) == [[2, 3], [1, 3], [-1, -1]]
+assert stream_solution(iter([4, 3, 5, 7, 8]), 12) == [0, 2]
+assert list(stream_matches((v for v in [4, 3, 5, 7, 8]), 12)) == [[0, 2], [2, 3]]
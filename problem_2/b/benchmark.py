@@ -0,0 +1,47 @@
+from __future__ import print_function
+
+import random
+import time
+
+from solution import (
+    ancestors, batch_parents, bulk, depth, find_root, lca, left_child, max_value, parent, right_child, solution,
+    subtree_range
+)
+
+
+def timed(f, *args):
+    start = time.time()
+    result = f(*args)
+    return result, time.time() - start
+
+
+def run(heights=(10, 30, 60), queries=10 ** 6):
+    print('{:>4} {:>10} {:>10} {:>10} {:>10}'.format('h', 'queries', 'find_root', 'parent', 'numpy'))
+    for h in heights:
+        rnd = random.Random(h)
+        q = [rnd.randint(1, max_value(h)) for _ in range(queries)]
+        root = max_value(h)
+        reference, t_reference = timed(lambda: [find_root(elem, root, h) for elem in q])
+        scalar, t_scalar = timed(solution, h, q)
+        vectorized, t_vectorized = timed(batch_parents, h, q)
+        assert reference == scalar == vectorized.tolist()
+        print('{:>4} {:>10} {:>9.3f}s {:>9.3f}s {:>9.3f}s'.format(h, queries, t_reference, t_scalar, t_vectorized))
+
+
+def run_navigation(heights=(30, 60), queries=10 ** 5):
+    """time per call of every navigation operation (through bulk)"""
+    operations = (parent, left_child, right_child, depth, subtree_range, ancestors, lca)
+    print('{:>4} {:>14} {:>12}'.format('h', 'operation', 'per call'))
+    for h in heights:
+        rnd = random.Random(h)
+        labels = [rnd.randint(1, max_value(h)) for _ in range(queries)]
+        others = [rnd.randint(1, max_value(h)) for _ in range(queries)]
+        for operation in operations:
+            columns = (labels, others) if operation is lca else (labels,)
+            _, elapsed = timed(bulk, operation, h, *columns)
+            print('{:>4} {:>14} {:>10.2f}us'.format(h, operation.__name__, elapsed / queries * 1e6))
+
+
+if __name__ == '__main__':
+    run()
+    run_navigation()
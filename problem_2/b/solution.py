@@ -1,6 +1,12 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
 def max_value(h):
     # total number of elements in the tree
-    return sum([2 ** level for level in range(h)])
+    return (1 << h) - 1
 
 
 def find_root(to_check, root_value, height):
@@ -23,10 +29,179 @@ def find_root(to_check, root_value, height):
     return root_value
 
 
+def position(label):
+    """
+    position returns the size 2^(k+1) - 1 of the subtree rooted at `label` (k = its height)
+    and whether `label` is a right child, in a post-order labelled perfect binary tree,
+    using bit operations only.
+
+    Post-order labels of perfect trees are laid out like a merkle mountain range: as long as
+    `label` is not of the form 2^m - 1 (i.e. the root of the leftmost subtree), it lies in the
+    right half of a tree of size 2^m - 1 (m = bit_length). Shifting it left by the size of
+    the left half (2^(m-1) - 1) keeps its height. If the last shift lands exactly on 2^(m-1) - 1,
+    `label` is the root of that right half, i.e. a right child.
+    """
+    right = False
+    while label & (label + 1):
+        half = (1 << (label.bit_length() - 1)) - 1
+        label -= half
+        right = label == half
+    return label, right
+
+
+def parent(label, h):
+    # a right child is directly followed by its parent,
+    # a left child by the subtree of its right sibling (same size), then by its parent.
+    if not 0 < label < max_value(h):
+        return -1
+    size, right = position(label)
+    return label + 1 if right else label + size + 1
+
+
 def solution(h, q):
-    base_root = max_value(h)
-    return [find_root(to_check=elem, root_value=base_root, height=h) for elem in q]
+    return [parent(elem, h) for elem in q]
+
+
+def check(label, h):
+    if not 0 < label <= max_value(h):
+        raise ValueError('Invalid label {} for height {}'.format(label, h))
+
+
+def left_child(label, h):
+    # the right child directly precedes its parent, the left child precedes the right subtree
+    check(label, h)
+    size, _ = position(label)
+    return -1 if size == 1 else label - 1 - size // 2
+
+
+def right_child(label, h):
+    check(label, h)
+    size, _ = position(label)
+    return -1 if size == 1 else label - 1
+
+
+def depth(label, h):
+    # the root has depth 0, leaves h - 1
+    check(label, h)
+    size, _ = position(label)
+    return h - size.bit_length()
+
+
+def subtree_range(label, h):
+    # post-order labels of a subtree are contiguous and end with its root
+    check(label, h)
+    size, _ = position(label)
+    return label - size + 1, label
+
+
+def path(label, h):
+    """
+    path descends from the root to `label` and returns (depth, directions), bit i of directions
+    being set if the ancestor at depth i + 1 (or `label`) is a right child. O(h)
+    """
+    check(label, h)
+    root, size = max_value(h), max_value(h)
+    level, directions = 0, 0
+    while root != label:
+        size //= 2
+        left_root = root - 1 - size
+        if label > left_root:
+            directions |= 1 << level
+            root -= 1
+        else:
+            root = left_root
+        level += 1
+    return level, directions
+
+
+def ancestors(label, h):
+    """
+    ancestors lazily yields the parent, grand parent, ... up to the root of `label`.
+    The directions are taken from one descent (path), every step up is O(1) then.
+    """
+    level, directions = path(label, h)
+    size = (1 << (h - level)) - 1
+    while level:
+        level -= 1
+        label = label + 1 if directions >> level & 1 else label + size + 1
+        size = 2 * size + 1
+        yield label
+
+
+def lca(a, b, h):
+    """lowest common ancestor of `a` and `b`, by descending from the root as long as both go the same way"""
+    check(a, h)
+    check(b, h)
+    root, size = max_value(h), max_value(h)
+    while a != root and b != root:
+        size //= 2
+        left_root = root - 1 - size
+        if a <= left_root and b <= left_root:
+            root = left_root
+        elif a > left_root and b > left_root:
+            root -= 1
+        else:
+            break
+    return root
+
+
+def bulk(operation, h, *columns):
+    """
+    bulk applies `operation` (any of the functions above taking a label and h) to every row of `columns`,
+    e.g. bulk(lca, h, labels, other_labels), ancestors are materialized as lists.
+    """
+    results = [operation(*(args + (h,))) for args in zip(*columns)]
+    return [list(result) for result in results] if operation is ancestors else results
+
+
+def batch_parents(h, q):
+    """
+    batch_parents is `parent` for a whole (uint64) numpy array of labels at once, h <= 63.
+    returns an int64 array (-1 for the root and invalid labels)
+    """
+    if np is None:
+        raise ImportError('batch_parents requires numpy')
+    q = np.asarray(q, dtype=np.uint64)
+    one = np.uint64(1)
+    size, right = batch_positions(q)
+    parents = np.where(right, q + one, q + size + one).astype(np.int64)
+    parents[(q == 0) | (q >= np.uint64(max_value(h)))] = -1
+    return parents
+
+
+def batch_positions(labels):
+    """`position` of every label of a uint64 array, returns (sizes, right)"""
+    labels = labels.copy()
+    right = np.zeros(labels.shape, dtype=bool)
+    one = np.uint64(1)
+    pending = (labels & (labels + one)) != 0
+    while pending.any():
+        label = labels[pending]
+        # smear the highest bit into all lower bits, i.e. highest bit - 1 == smeared >> 1
+        half = label.copy()
+        for shift in (1, 2, 4, 8, 16, 32):
+            half |= half >> np.uint64(shift)
+        half >>= one
+        label -= half
+        labels[pending] = label
+        right[pending] = label == half
+        pending[pending] = (label & (label + one)) != 0
+    return labels, right
 
 
 assert solution(3, [7, 3, 5, 1]) == [-1, 7, 6, 3]
 assert solution(5, [19, 14, 28]) == [21, 15, 29]
+assert all(
+    solution(h, range(1, 2 ** h + 1)) == [find_root(elem, max_value(h), h) for elem in range(1, 2 ** h + 1)]
+    for h in range(1, 8)
+)
+
+if np is not None:
+    assert batch_parents(5, [19, 14, 28, 31, 0]).tolist() == [21, 15, 29, -1, -1]
+    assert batch_parents(60, [2 ** 60 - 2, 2 ** 59 - 1]).tolist() == [2 ** 60 - 1, 2 ** 60 - 1]
+
+assert [left_child(7, 3), right_child(7, 3), left_child(6, 3), right_child(1, 3)] == [3, 6, 4, -1]
+assert [depth(7, 3), depth(3, 3), depth(5, 3)] == [0, 1, 2]
+assert list(ancestors(4, 3)) == [6, 7] and list(ancestors(7, 3)) == []
+assert bulk(lca, 5, [1, 4, 19, 30, 17], [2, 16, 14, 31, 22]) == [3, 31, 31, 31, 22]
+assert subtree_range(14, 5) == (8, 14)
@@ -0,0 +1,189 @@
+from __future__ import print_function
+
+import random
+import time
+
+from solution import (
+    IncrementalSolver, StateView, batch_solution, decompose, float_solution, normalize, pad_stack, solution
+)
+
+
+def random_chain(n, nonzeros, window=20, seed=0):
+    """
+    random absorbing chain with `n` states, the last tenth of them terminal.
+    Every transient row has up to `nonzeros` non-zero counts to states within `window`
+    of itself (ore chains mostly move between neighbouring states), one of them pointing
+    to a higher state, so every state eventually reaches a terminal state.
+    Unstructured random graphs fill in completely during elimination and their exact
+    fractions grow with the number of states, for any exact solver.
+    """
+    rnd = random.Random(seed)
+    n_terminal = max(1, n // 10)
+    m = [[0] * n for _ in range(n)]
+    for i in range(n - n_terminal):
+        m[i][rnd.randrange(i + 1, min(n, i + window + 1))] = rnd.randint(1, 9)
+        for _ in range(nonzeros - 1):
+            m[i][rnd.randrange(max(0, i - window), min(n, i + window + 1))] = rnd.randint(1, 9)
+        # some states leak directly into a terminal state
+        if rnd.random() < 0.1:
+            m[i][rnd.randrange(n - n_terminal, n)] = rnd.randint(1, 9)
+    return m
+
+
+def timed(f, *args, **kwargs):
+    start = time.time()
+    result = f(*args, **kwargs)
+    return result, time.time() - start
+
+
+def seconds(t):
+    return '-' if t is None else '{:.4f}s'.format(t)
+
+
+def run(sizes=(10, 50, 100, 200, 500, 1000, 2000, 4000), nonzeros=(1, 2, 3)):
+    print('{:>6} {:>8} {:>10} {:>10} {:>10}'.format('states', 'nonzeros', 'sparse', 'dense', 'float'))
+    for n in sizes:
+        for k in nonzeros:
+            m = random_chain(n, k)
+            sparse, t_sparse = timed(solution, m, method='sparse')
+            t_dense = t_float = None
+            if n <= 200:
+                dense, t_dense = timed(solution, m, method='dense')
+                assert dense == sparse
+            if n <= 50:
+                _, t_float = timed(solution, m, method='float')
+            print('{:>6} {:>8} {:>10} {:>10} {:>10}'.format(n, k, *map(seconds, (t_sparse, t_dense, t_float))))
+
+
+def run_batch(chains=10000, max_size=10):
+    rnd = random.Random(0)
+    matrices = [random_chain(rnd.randint(2, max_size), 3, seed=k) for k in range(chains)]
+    stack, sizes = pad_stack(matrices)
+
+    floats, t_batch = timed(batch_solution, stack, sizes)
+    exact, t_exact = timed(batch_solution, stack, sizes, exact=True)
+    _, t_single = timed(lambda: [float_solution(m) for m in matrices])
+    mismatches = sum(a != b for a, b in zip(floats, exact))
+
+    print('{} chains of up to {} states'.format(chains, max_size))
+    print('batch float: {:.4f}s ({:.0f} chains/s)'.format(t_batch, chains / t_batch))
+    print('batch exact: {:.4f}s ({:.0f} chains/s)'.format(t_exact, chains / t_exact))
+    print('float_solution per call: {:.4f}s ({:.0f} chains/s)'.format(t_single, chains / t_single))
+    print('float/exact mismatches: {}'.format(mismatches))
+
+
+# previous implementation of reordering / normalization, kept as the baseline for run_reorder
+def legacy_swap(m, i, j):
+    if i == j:
+        return m
+    n = []
+    for r in range(len(m)):
+        res_row = []
+        temp_row = m[r]
+        if r == i:
+            temp_row = m[j]
+        if r == j:
+            temp_row = m[i]
+        for c in range(len(m)):
+            temp_cell = temp_row[c]
+            if c == i:
+                temp_cell = temp_row[j]
+            if c == j:
+                temp_cell = temp_row[i]
+            res_row.append(temp_cell)
+        n.append(res_row)
+    return n
+
+
+def legacy_sort(m):
+    zero_row = -1
+    for row in range(len(m)):
+        if not any(m[row]):
+            zero_row = row
+        if any(m[row]) and zero_row > -1:
+            return legacy_sort(legacy_swap(m, row, zero_row))
+    return m
+
+
+def legacy_decompose(m):
+    m = [[elem / sum(row) if elem else 0 for elem in row] if sum(row) != 0 else row for row in m]
+    m = legacy_sort(m)
+    t = sum([any(row) for row in m])
+    return [row[:t] for row in m][:t], [row[t:] for row in m][:t]
+
+
+def traced(f, *args):
+    import tracemalloc
+
+    tracemalloc.start()
+    start = time.time()
+    result = f(*args)
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run_reorder(n=2000, misplaced=4):
+    """
+    peak allocation and time of reordering, normalizing and decomposing a `n` state matrix
+    with `misplaced` terminal states close to the end of the transient ones.
+    The legacy sort bubbles every misplaced terminal state past each transient state behind it,
+    one swap and one recursion per step, and every frame keeps its copy of the matrix.
+    I.e. peak memory grows with n^2 * swaps, and terminal states placed early in a large matrix
+    hit the recursion limit. Hence only a few misplaced states close to the end here.
+    """
+    m = random_chain(n, 3)
+    transient = n - max(1, n // 10)
+    for i in range(1, misplaced + 1):
+        m[transient - 2 * i] = [0] * n
+
+    (Q, R), t_view, peak_view = traced(lambda: decompose(normalize(StateView(m))))
+    (Q_legacy, R_legacy), t_legacy, peak_legacy = traced(legacy_decompose, m)
+    assert Q == Q_legacy
+
+    print('{} states, {} misplaced terminal states'.format(n, misplaced))
+    print('legacy sort/swap: {:.2f}s, peak {:.1f} MB'.format(t_legacy, peak_legacy / 2 ** 20))
+    print('state view:       {:.2f}s, peak {:.1f} MB'.format(t_view, peak_view / 2 ** 20))
+
+
+def run_incremental(n=1000, update_sizes=(1, 2, 5, 10, 50, 200), rounds=5):
+    """
+    time of IncrementalSolver.update against a cold IncrementalSolver (i.e. a full inversion)
+    when `k` random transient rows change, and the largest deviation between the two.
+    """
+    import numpy as np
+
+    rnd = random.Random(1)
+    m = random_chain(n, 3)
+    transient = [i for i, row in enumerate(m) if any(row)]
+    solver = IncrementalSolver(m, max_updates=10 ** 9)
+
+    print('{:>6} {:>12} {:>12} {:>10} {:>10}'.format('rows', 'incremental', 'cold', 'speedup', 'error'))
+    for k in update_sizes:
+        t_incremental = t_cold = error = 0
+        for r in range(rounds):
+            fresh = random_chain(n, 3, seed=1000 * k + r)
+            rows = dict((i, fresh[i]) for i in rnd.sample(transient, k) if any(fresh[i]))
+
+            start = time.time()
+            solver.update(rows)
+            incremental = solver.probabilities()
+            t_incremental += time.time() - start
+
+            start = time.time()
+            cold = IncrementalSolver(solver.m).probabilities()
+            t_cold += time.time() - start
+            error = max(error, np.abs(np.subtract(incremental, cold)).max())
+
+        print('{:>6} {:>11.4f}s {:>11.4f}s {:>9.1f}x {:>10.1e}'.format(
+            k, t_incremental / rounds, t_cold / rounds, t_cold / t_incremental, error
+        ))
+    print('refactors: {}'.format(solver.refactors))
+
+
+if __name__ == '__main__':
+    run()
+    run_batch()
+    run_reorder()
+    run_incremental()
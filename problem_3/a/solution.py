@@ -1,53 +1,61 @@
 from __future__ import division
-from fractions import Fraction, gcd
+from fractions import Fraction
+from functools import reduce
+from heapq import heapify, heappop, heappush
 from itertools import starmap
 from operator import mul
 
-
-# swap i,j rows/columns of a square matrix `m`
-def swap(m, i, j):
-    if i == j:
-        return m
-
-    n = []
-
-    for r in range(len(m)):
-        res_row = []
-        temp_row = m[r]
-        if r == i:
-            temp_row = m[j]
-        if r == j:
-            temp_row = m[i]
-        for c in range(len(m)):
-            temp_cell = temp_row[c]
-            if c == i:
-                temp_cell = temp_row[j]
-            if c == j:
-                temp_cell = temp_row[i]
-            res_row.append(temp_cell)
-        n.append(res_row)
-
-    return n
-
-
-def sort(m):
-    zero_row = -1
-    for row in range(len(m)):
-
-        if not any(m[row]):
-            zero_row = row
-
-        if any(m[row]) and zero_row > -1:
-            swapped = swap(m, row, zero_row)
-            return sort(swapped)
-
-    return m
-
-
-def decompose(m):
-    t = sum([any(row) for row in m])
-    Q = [row[:t] for row in m][:t]
-    R = [row[t:] for row in m][:t]
+try:
+    from math import gcd
+except ImportError:
+    from fractions import gcd
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def state_order(m):
+    """
+    state_order returns the permutation of states with all transient states first
+    and all terminal states last (both in index order).
+    Replaces sorting the matrix by swapping rows/columns, i.e. there is neither recursion
+    nor a copy of `m`, regardless of the number of terminal states.
+    """
+    transient = [i for i, row in enumerate(m) if any(row)]
+    terminal = [i for i, row in enumerate(m) if not any(row)]
+    return transient + terminal
+
+
+class StateView(object):
+    """
+    StateView reads the square matrix `m` with its states permuted by `order`
+    (state_order by default), i.e. view.row(i)[j] == m[order[i]][order[j]], without copying `m`.
+    If `totals` (the row sums of `m`) are given, rows are normalized to probabilities on read.
+    """
+
+    def __init__(self, m, order=None, totals=None):
+        self.m = m
+        self.order = state_order(m) if order is None else order
+        self.totals = totals
+
+    def __len__(self):
+        return len(self.order)
+
+    def row(self, i, start=0, stop=None):
+        row = self.m[self.order[i]]
+        columns = self.order[start:stop]
+        total = self.totals[self.order[i]] if self.totals is not None else 0
+        if not total:
+            return [row[c] for c in columns]
+        return [row[c] / total if row[c] else 0 for c in columns]
+
+
+def decompose(view):
+    t = sum(1 for i in view.order if any(view.m[i]))
+    Q = [view.row(i, 0, t) for i in range(t)]
+    R = [view.row(i, t) for i in range(t)]
     return Q, R
 
 
@@ -132,18 +140,15 @@ def format_solution(arr):
            ] + [denom]
 
 
-def normalize(m):
-    return [[elem / sum(row) if elem else 0 for elem in row] if sum(row) != 0 else row for row in m]
+def normalize(view):
+    return StateView(view.m, view.order, [sum(row) for row in view.m])
 
 
-def solution(m):
+def float_solution(m):
     if len(m) == 1:
         return [1, 1]
 
-    m = normalize(m)
-    m = sort(m)
-
-    Q, R = decompose(m)
+    Q, R = decompose(normalize(StateView(m)))
 
     # https://www.dartmouth.edu/~chance/teaching_aids/books_articles/probability_book/Chapter11.pdf
     # terminal probabilities are determined as:
@@ -155,6 +160,340 @@ def solution(m):
     return format_solution(terminal_states)
 
 
+def transitions(m):
+    """
+    transitions builds a sparse view of `m` restricted to the states reachable from state 0.
+
+    returns:
+    rows -- {state: {next_state: count}} for every reachable non-terminal state
+    terminal -- terminal states (i.e. all-zero rows) in index order
+    """
+    terminal = [i for i, row in enumerate(m) if not any(row)]
+    rows = {}
+    stack = [0]
+    while stack:
+        i = stack.pop()
+        if i in rows or not any(m[i]):
+            continue
+        rows[i] = dict((j, count) for j, count in enumerate(m[i]) if count)
+        stack.extend(j for j in rows[i] if j not in rows)
+    return rows, terminal
+
+
+def fold_self_loop(out, den, i):
+    # d * x_i = c * x_i + rest  <=>  (d - c) * x_i = rest
+    den[i] -= out.pop(i, 0)
+    if not den[i]:
+        raise ValueError('State {} never reaches a terminal state'.format(i))
+
+
+def reduce_row(out, term, den, i):
+    # divide row i by the gcd of all its integers, keeps the integers from growing
+    g = den[i]
+    for row in (out, term):
+        for count in row.values():
+            g = gcd(g, count)
+            if g == 1:
+                return
+    for row in (out, term):
+        for j in row:
+            row[j] //= g
+    den[i] //= g
+
+
+def sparse_terminal_probabilities(m):
+    """
+    sparse_terminal_probabilities solves for the first row of B = (I - Q)^-1 * R only,
+    without ever building Q, R or an inverse.
+
+    Every transient state i is kept as an integer equation
+        den_i * x_i = sum_j out_ij * x_j + sum_t term_it
+    starting from the raw counts of `m` (no normalization).
+    Every transient state k != 0 is eliminated by substituting its equation into all
+    equations referencing it (i.e. a single sparse, fraction-free Gaussian elimination).
+    States are eliminated cheapest first (in-degree * out-degree) to keep the fill-in low.
+    Once only state 0 is left, term_0t / den_0 are the terminal probabilities.
+    """
+    rows, terminal = transitions(m)
+    if not rows:
+        # state 0 is terminal itself
+        return [Fraction(int(t == 0)) for t in terminal]
+
+    out, term, den, inn = {}, {}, {}, dict((i, set()) for i in rows)
+    for i, row in rows.items():
+        out[i] = dict((j, count) for j, count in row.items() if j in rows)
+        term[i] = dict((j, count) for j, count in row.items() if j not in rows)
+        den[i] = sum(row.values())
+        fold_self_loop(out[i], den, i)
+        for j in out[i]:
+            inn[j].add(i)
+
+    heap = [(len(inn[k]) * len(out[k]), k) for k in out if k != 0]
+    heapify(heap)
+    while heap:
+        cost, k = heappop(heap)
+        if k not in out:
+            continue
+        current = len(inn[k]) * len(out[k])
+        if cost != current:
+            heappush(heap, (current, k))
+            continue
+
+        k_out, k_term, k_den = out.pop(k), term.pop(k), den.pop(k)
+        for j in k_out:
+            inn[j].discard(k)
+        for i in inn.pop(k):
+            weight = out[i].pop(k)
+            for row, k_row in ((out[i], k_out), (term[i], k_term)):
+                for j in row:
+                    row[j] *= k_den
+                for j, count in k_row.items():
+                    row[j] = row.get(j, 0) + weight * count
+            for j in k_out:
+                if j != i:
+                    inn[j].add(i)
+            den[i] *= k_den
+            fold_self_loop(out[i], den, i)
+            reduce_row(out[i], term[i], den, i)
+
+    return [Fraction(term[0].get(t, 0), den[0]) for t in terminal]
+
+
+def dense_terminal_probabilities(m):
+    """
+    dense_terminal_probabilities is the dense fallback of sparse_terminal_probabilities and
+    yields identical (exact) results.
+
+    Instead of inverting I - Q column by column, (I - Q)^T * y = e_0 is solved once by
+    Gauss-Jordan elimination in Fractions, y^T being the first row of (I - Q)^-1.
+    The first row of B then is y^T * R.
+    """
+    rows, terminal = transitions(m)
+    if not rows:
+        return [Fraction(int(t == 0)) for t in terminal]
+
+    states = sorted(rows)
+    index = dict((state, k) for k, state in enumerate(states))
+    n = len(states)
+
+    # augmented matrix [(I - Q)^T | e_0]
+    a = [[Fraction(int(r == c)) for c in range(n)] + [Fraction(int(r == 0))] for r in range(n)]
+    for i in states:
+        total = sum(rows[i].values())
+        for j, count in rows[i].items():
+            if j in index:
+                a[index[j]][index[i]] -= Fraction(count, total)
+
+    for col in range(n):
+        pivot = next((r for r in range(col, n) if a[r][col]), None)
+        if pivot is None:
+            raise ValueError('Gauss elimination failed!')
+        swap_row(a, col, pivot)
+        a[col] = [v / a[col][col] for v in a[col]]
+        for r in range(n):
+            if r != col and a[r][col]:
+                ratio = a[r][col]
+                a[r] = [v - ratio * w for v, w in zip(a[r], a[col])]
+
+    y = [row[n] for row in a]
+    return [
+        Fraction(sum(y[index[i]] * Fraction(rows[i].get(t, 0), sum(rows[i].values())) for i in states))
+        for t in terminal
+    ]
+
+
+def format_exact(arr):
+    # same output as format_solution, but for exact Fractions (no limit_denominator)
+    denom = reduce(lcm, [state.denominator for state in arr], 1)
+    return [state.numerator * denom // state.denominator for state in arr] + [denom]
+
+
+def solution(m, method='sparse'):
+    """
+    solution returns the terminal probabilities of the absorbing markov chain `m`
+    (starting in state 0) as numerators followed by their common denominator.
+
+    arguments:
+    m -- square matrix of non-negative integers, all-zero rows are terminal states
+    method -- 'sparse' (default): exact sparse elimination, see sparse_terminal_probabilities
+              'dense': exact dense elimination, see dense_terminal_probabilities
+              'float': original dense float pipeline via matrix_inverse
+    """
+    if method == 'sparse':
+        return format_exact(sparse_terminal_probabilities(m))
+    if method == 'dense':
+        return format_exact(dense_terminal_probabilities(m))
+    if method == 'float':
+        return float_solution(m)
+    raise ValueError('Invalid method: {}'.format(method))
+
+
+def pad_stack(matrices):
+    """
+    pad_stack zero-pads square matrices of different sizes to a common size.
+
+    returns:
+    stack -- int array of shape (len(matrices), n, n)
+    sizes -- int array with the original size of every matrix
+    """
+    if np is None:
+        raise ImportError('pad_stack requires numpy')
+    sizes = np.array([len(m) for m in matrices])
+    stack = np.zeros((len(matrices), sizes.max(), sizes.max()), dtype=np.int64)
+    for k, m in enumerate(matrices):
+        stack[k, :sizes[k], :sizes[k]] = m
+    return stack, sizes
+
+
+def batch_terminal_probabilities(stack, sizes=None):
+    """
+    batch_terminal_probabilities solves a whole stack of absorbing chains with a single
+    vectorized float solve.
+
+    Normalization as well as the Q/R split are done with masks on the full stack instead of
+    sorting terminal states to the end of each matrix: with the terminal rows of P being
+    zero, I - P is (I - Q) for transient rows and identity for terminal rows.
+    Solving (I - P)^T * y = e_0 yields the first row of (I - P)^-1, whose entries at the
+    terminal states are exactly the first row of B = (I - Q)^-1 * R.
+
+    arguments:
+    stack -- array-like of shape (b, n, n), matrices smaller than n zero-padded
+    sizes -- original size of every matrix (padded states are never terminal)
+
+    returns:
+    probabilities -- float array (b, n), terminal probabilities (0 for other states)
+    terminal -- bool array (b, n), terminal states of every chain
+    """
+    if np is None:
+        raise ImportError('batch_terminal_probabilities requires numpy')
+    system = np.array(stack, dtype=float)
+    b, n, _ = system.shape
+    valid = np.ones((b, n), dtype=bool) if sizes is None else np.arange(n) < np.asarray(sizes)[:, None]
+
+    totals = system.sum(axis=2)
+    terminal = (totals == 0) & valid
+    totals[totals == 0] = 1
+
+    # system = I - P, in place
+    system /= -totals[:, :, None]
+    system[:, np.arange(n), np.arange(n)] += 1
+
+    start = np.zeros((b, n, 1))
+    start[:, 0] = 1
+    y = np.linalg.solve(system.transpose(0, 2, 1), start)[:, :, 0]
+    return np.where(terminal, y, 0), terminal
+
+
+def batch_solution(stack, sizes=None, exact=False):
+    """
+    batch_solution returns `solution` for every chain of the stack.
+
+    arguments:
+    stack, sizes -- see batch_terminal_probabilities
+    exact -- False: vectorized float path, formatted by format_solution like float_solution
+             True: exact rational path (sparse_terminal_probabilities) per chain, to verify
+                   the float path against
+    """
+    if exact:
+        if sizes is None:
+            sizes = [len(m) for m in stack]
+        return [
+            format_exact(sparse_terminal_probabilities([[int(c) for c in row[:size]] for row in m[:size]]))
+            for m, size in zip(stack, sizes)
+        ]
+    probabilities, terminal = batch_terminal_probabilities(stack, sizes)
+    return [format_solution(p[t].tolist()) for p, t in zip(probabilities, terminal)]
+
+
+class IncrementalSolver(object):
+    """
+    IncrementalSolver keeps (I - Q)^-1 of the chain `m` and updates it when only a few rows
+    of `m` change, instead of inverting I - Q again.
+
+    Changing the transient rows k of `m` changes I - Q by U = -(Q'[k] - Q[k]) in these rows only,
+    i.e. I - Q' = (I - Q) + E_k * U, and by the Woodbury identity
+        (I - Q')^-1 = A - A[:, k] * (I + U * A[:, k])^-1 * U * A      with A = (I - Q)^-1
+    which costs O(t^2 * len(k)) instead of O(t^3).
+
+    The inverse is recomputed from scratch (refactor) whenever
+        - a row turns from transient to terminal or vice versa (the decomposition changes),
+        - the Woodbury system is ill-conditioned,
+        - `max_updates` updates have been applied since the last refactor,
+        - the terminal probabilities drift from summing up to one by more than `tolerance`.
+    """
+
+    def __init__(self, m, max_updates=100, tolerance=1e-9):
+        if np is None:
+            raise ImportError('IncrementalSolver requires numpy')
+        self.m = [list(row) for row in m]
+        self.max_updates = max_updates
+        self.tolerance = tolerance
+        # the initial factorization does not count as refactor
+        self.refactors = -1
+        self.refactor()
+
+    def refactor(self):
+        self.order = state_order(self.m)
+        Q, R = decompose(normalize(StateView(self.m, self.order)))
+        self.t = len(Q)
+        self.position = dict((state, k) for k, state in enumerate(self.order))
+        self.Q = np.array(Q, dtype=float).reshape(self.t, self.t)
+        self.R = np.array(R, dtype=float).reshape(self.t, len(self.m) - self.t)
+        self.inverse = np.linalg.inv(np.eye(self.t) - self.Q)
+        self.updates = 0
+        self.refactors += 1
+
+    def update(self, rows):
+        """
+        update replaces rows of `m`.
+
+        arguments:
+        rows -- {state: new_row}
+        """
+        transient_changed = False
+        for state, row in rows.items():
+            transient_changed |= bool(any(row)) != bool(any(self.m[state]))
+            self.m[state] = list(row)
+
+        if transient_changed or self.updates + len(rows) > self.max_updates:
+            return self.refactor()
+
+        k = [self.position[state] for state in rows if any(self.m[state])]
+        if not k:
+            return
+        # normalize the changed rows only
+        view = StateView(self.m, self.order, dict((state, sum(self.m[state])) for state in rows))
+        Q_k = np.array([view.row(i, 0, self.t) for i in k], dtype=float)
+        R_k = np.array([view.row(i, self.t) for i in k], dtype=float).reshape(len(k), -1)
+
+        U = self.Q[k] - Q_k
+        A_k = self.inverse[:, k]
+        capacitance = np.eye(len(k)) + U.dot(A_k)
+        if np.linalg.cond(capacitance) > 1 / self.tolerance:
+            return self.refactor()
+
+        self.inverse -= A_k.dot(np.linalg.solve(capacitance, U.dot(self.inverse)))
+        self.Q[k] = Q_k
+        self.R[k] = R_k
+        self.updates += len(k)
+
+    def probabilities(self):
+        """terminal probabilities (starting in state 0) in index order of the terminal states"""
+        if not any(self.m[0]):
+            return [float(state == 0) for state in self.order[self.t:]]
+
+        b = self.inverse[0].dot(self.R)
+        if abs(b.sum() - 1) > self.tolerance and self.updates:
+            self.refactor()
+            b = self.inverse[0].dot(self.R)
+
+        # terminal states are in index order in self.order already
+        return b.tolist()
+
+    def solution(self):
+        return format_solution(self.probabilities())
+
+
 test = [
     [0, 2, 1, 0, 0],
     [0, 0, 0, 3, 4],
@@ -163,6 +502,7 @@ test = [
     [0, 0, 0, 0, 0]
 ]
 assert solution(test) == [7, 6, 8, 21]
+assert solution(test, method='dense') == solution(test, method='float') == [7, 6, 8, 21]
 
 test = [
     [0, 1, 0, 0, 0, 1],
@@ -173,3 +513,18 @@ test = [
     [0, 0, 0, 0, 0, 0]
 ]
 assert solution(test) == [0, 3, 2, 9, 14]
+assert solution(test, method='dense') == solution(test, method='float') == [0, 3, 2, 9, 14]
+
+assert solution([[0]]) == [1, 1]
+
+if np is not None:
+    tests = [test, [[0, 2, 1, 0, 0], [0, 0, 0, 3, 4], [0, 0, 0, 0, 0], [0, 0, 0, 0, 0], [0, 0, 0, 0, 0]], [[0]]]
+    assert batch_solution(*pad_stack(tests)) == batch_solution(*pad_stack(tests), exact=True) == [
+        [0, 3, 2, 9, 14], [7, 6, 8, 21], [1, 1]
+    ]
+
+    solver = IncrementalSolver(test)
+    solver.update({1: [0, 0, 0, 3, 4, 0]})
+    assert solver.solution() == solution(solver.m) == [0, 3, 4, 7, 14] and solver.refactors == 0
+    solver.update({0: [0, 0, 0, 0, 0, 0]})
+    assert solver.solution() == solution(solver.m) == [1, 0, 0, 0, 0, 1] and solver.refactors == 1
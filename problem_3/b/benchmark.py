@@ -0,0 +1,142 @@
+from __future__ import division, print_function
+
+import random
+import time
+
+from solution import (
+    Maze, astar_solution, bidirectional_solution, compact_solution, layered_solution, queries, solution, to_cell
+)
+
+
+def random_maze(h, w, density=0.3, seed=0):
+    rnd = random.Random(seed)
+    mat = [[int(rnd.random() < density) for _ in range(w)] for _ in range(h)]
+    mat[0][0] = mat[h - 1][w - 1] = 0
+    return mat
+
+
+def serpentine_maze(h, w):
+    """
+    adversarial maze: corridors separated by walls two cells thick, connected at alternating ends.
+    Removing a single wall never shortens the path, so both layers are explored completely.
+    """
+    mat = [[0] * w for _ in range(h)]
+    for y in range(1, h - 1, 3):
+        gap = w - 1 if (y // 3) % 2 == 0 else 0
+        for wall_row in (y, y + 1):
+            if wall_row < h - 1:
+                mat[wall_row] = [int(x != gap) for x in range(w)]
+    return mat
+
+
+def timed(f, *args, **kwargs):
+    start = time.time()
+    result = f(*args, **kwargs)
+    return result, time.time() - start
+
+
+def run(sizes=(100, 500, 1000, 2000, 4000), methods=('compact', 'points'), max_points=1000):
+    print('{:>10} {:>6} {:>10} {:>10} {:>8}'.format('maze', 'size', 'compact', 'points', 'steps'))
+    for name, maze in (('random', random_maze), ('serpentine', serpentine_maze)):
+        for n in sizes:
+            mat = maze(n, n)
+            times = {}
+            results = set()
+            for method in methods:
+                if method == 'points' and n > max_points:
+                    continue
+                result, times[method] = timed(solution, mat, method=method)
+                results.add(result)
+            assert len(results) == 1
+            print('{:>10} {:>6} {:>10} {:>10} {:>8}'.format(
+                name, n, *['{:.3f}s'.format(times[m]) if m in times else '-' for m in methods] + [results.pop()]
+            ))
+
+
+def peak_memory(f, *args, **kwargs):
+    import tracemalloc
+
+    tracemalloc.start()
+    f(*args, **kwargs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def run_layered(n=500, budgets=(1, 4, 16, 64), densities=(0, 0.05)):
+    """time and peak allocation of layered_solution (incl. path) with and without pruning over the wall budget k"""
+    print('{:>8} {:>4} {:>6} {:>10} {:>10} {:>10} {:>10}'.format(
+        'density', 'k', 'steps', 'layered', 'peak', 'pruned', 'peak'
+    ))
+    for density, k in ((density, k) for density in densities for k in budgets):
+        mat = random_maze(n, n, density)
+        row = []
+        for prune in (False, True):
+            (steps, _), elapsed = timed(layered_solution, mat, k, path=True, prune=prune)
+            peak = peak_memory(layered_solution, mat, k, path=True, prune=prune)
+            row += ['{:.3f}s'.format(elapsed), '{:.1f}MB'.format(peak / 2 ** 20)]
+        print('{:>8} {:>4} {:>6} {:>10} {:>10} {:>10} {:>10}'.format(density, k, steps, *row))
+
+
+def run_strategies(sizes=(100, 300, 1000), densities=(0, 0.1, 0.3)):
+    """expanded states and wall time per search strategy"""
+    strategies = (('bfs', compact_solution), ('bidirectional', bidirectional_solution), ('astar', astar_solution))
+    print('{:>6} {:>8} {:>14} {:>8} {:>10} {:>10}'.format('size', 'density', 'strategy', 'steps', 'expanded', 'time'))
+    for n in sizes:
+        for density in densities:
+            mat = random_maze(n, n, density)
+            results = set()
+            for name, strategy in strategies:
+                stats = {}
+                steps, elapsed = timed(strategy, mat, stats=stats)
+                results.add(steps)
+                print('{:>6} {:>8} {:>14} {:>8} {:>10} {:>9.3f}s'.format(
+                    n, density, name, steps, stats['expanded'], elapsed
+                ))
+            assert len(results) == 1
+
+
+def run_queries(n=500, density=0.3, endpoints=20, queries_per_pair=5):
+    """
+    query latency of Maze after warm-up against one compact_solution BFS per query,
+    for all pairs of `endpoints` random passable cells, each pair asked `queries_per_pair` times.
+    """
+    rnd = random.Random(0)
+    mat = random_maze(n, n, density)
+    free = [(y, x) for y in range(n) for x in range(n) if not mat[y][x]]
+    cells = rnd.sample(free, endpoints)
+    pairs = [(a, b) for a in cells for b in cells if a < b]
+
+    maze, t_setup = timed(Maze, mat, fields=endpoints)
+    _, t_warmup = timed(lambda: [maze.field(to_cell(cell, maze.width)) for cell in cells])
+
+    start = time.time()
+    for source, target in pairs:
+        maze.shortest_path(source, target)
+    t_first = (time.time() - start) / len(pairs)
+
+    start = time.time()
+    for _ in range(queries_per_pair - 1):
+        for source, target in pairs:
+            maze.shortest_path(source, target)
+    t_cached = (time.time() - start) / (len(pairs) * (queries_per_pair - 1))
+
+    sample = pairs[:10]
+    start = time.time()
+    for source, target in sample:
+        assert compact_solution(mat, source=source, target=target) == maze.shortest_path(source, target)
+    t_bfs = (time.time() - start) / len(sample)
+
+    print('{0}x{0} maze, {1} endpoints, {2} pairs'.format(n, endpoints, len(pairs)))
+    print('setup {:.3f}s, warm-up ({} fields) {:.3f}s'.format(t_setup, endpoints, t_warmup))
+    print('per query: first {:.2f}ms, repeated {:.4f}ms, per-call BFS {:.2f}ms'.format(
+        t_first * 1000, t_cached * 1000, t_bfs * 1000
+    ))
+    print('query cache hit rate: {:.1%}'.format(queries.hits / max(1, queries.hits + queries.misses)))
+
+
+if __name__ == '__main__':
+    run()
+    run_layered()
+    run_strategies()
+    run_queries()
@@ -1,4 +1,7 @@
-from collections import deque
+import hashlib
+from array import array
+from collections import OrderedDict, deque
+from heapq import heappop, heappush
 
 
 class Point(object):
@@ -28,9 +31,9 @@ def is_valid(row, col, h, w):
     return (0 <= row < h) and (0 <= col < w)
 
 
-def solution(mat):
+def point_solution(mat):
     """
-    solution solves for the shortest path from 0,0 (src) to h-1,w-1 (destination) and returns
+    point_solution solves for the shortest path from 0,0 (src) to h-1,w-1 (destination) and returns
     number of steps required (incl. src and destination), while going through at most one wall.
 
     Implementation via a breadth-first-search approach with a double layered graph.
@@ -101,14 +104,510 @@ def solution(mat):
                 raise ValueError('Invalid layer: {}'.format(layer))
 
 
+def frame(mat):
+    """
+    frame flattens `mat` into a bytearray of walls, framed by a border of one cell.
+
+    returns:
+    width -- w + 2, i.e. cell (x, y) of `mat` is (y + 1) * width + x + 1
+    size -- number of cells incl. the border
+    walls -- bytearray, 1 for walls (the border itself is no wall)
+    border -- bytearray, 1 for border cells
+    """
+    h, w = (len(mat), len(mat[0]))
+    width = w + 2
+    size = (h + 2) * width
+
+    walls = bytearray(size)
+    border = bytearray([1]) * size
+    for y, row in enumerate(mat):
+        start = (y + 1) * width + 1
+        walls[start:start + w] = bytearray(row)
+        border[start:start + w] = bytearray(w)
+    return width, size, walls, border
+
+
+def to_cell(coordinates, width):
+    row, col = coordinates
+    return (row + 1) * width + col + 1
+
+
+def to_coordinates(cells, width):
+    return [((cell // width) - 1, (cell % width) - 1) for cell in cells]
+
+
+def compact_solution(mat, stats=None, source=(0, 0), target=None):
+    """
+    compact_solution is point_solution on flat integer states instead of Point/Node objects,
+    with identical semantics (see point_solution) and results.
+
+    States:
+        - the maze is framed by a border of cells that are marked visited in both layers,
+          so neighbours never need a bounds check
+        - cell = (y + 1) * (w + 2) + x + 1, state = layer * size + cell
+        - walls and visited (layer 0 followed by layer 1) are bytearrays
+        - every state is enqueued at most once, so a preallocated array of 2 * size states
+          with head/tail indices serves as queue; the distance is tracked per BFS level.
+
+    If a dict `stats` is given, the number of expanded states is stored as stats['expanded'].
+    `source` and `target` (row, col) default to 0,0 and h-1,w-1.
+    """
+    width, size, walls, border = frame(mat)
+    src = to_cell(source, width)
+    dest = size - width - 2 if target is None else to_cell(target, width)
+
+    visited = border * 2
+
+    queue = array('i', [0]) * (2 * size)
+    queue[0] = src
+
+    head, tail, dist = 0, 1, 1
+    while head < tail:
+        level_end = tail
+        while head < level_end:
+            state = queue[head]
+            head += 1
+            if state == dest or state == size + dest:
+                if stats is not None:
+                    stats['expanded'] = head
+                return dist
+
+            if state < size:
+                for adj in (state - width, state + width, state - 1, state + 1):
+                    if not visited[adj]:
+                        visited[adj] = 1
+                        visited[size + adj] = 1
+                        # move up to layer 1 when hitting a wall
+                        queue[tail] = adj + size if walls[adj] else adj
+                        tail += 1
+            else:
+                for adj in (state - width, state + width, state - 1, state + 1):
+                    if not visited[adj] and not walls[adj - size]:
+                        visited[adj] = 1
+                        queue[tail] = adj
+                        tail += 1
+        dist += 1
+
+
+def bidirectional_solution(mat, stats=None):
+    """
+    bidirectional_solution runs the two-layer BFS of compact_solution from src and from
+    the destination at the same time, always expanding the smaller frontier by one level.
+
+    Per side and cell two distances (cells incl. both ends) are kept:
+        - dist[cell]: shortest path without any wall
+        - dist[size + cell]: shortest path through at most one wall
+    (a cell discovered in layer 0 also sets the layer 1 distance, as in compact_solution).
+
+    Meeting in cell c, a path through at most one wall consists of
+        - for a passable c: a wall-free half and a half through at most one wall
+        - for a wall c: two halves through (only) c
+    Once the best meeting is no longer than forward depth + backward depth - 1,
+    no shorter path can exist (it would have met in between).
+
+    See compact_solution for `stats`.
+    """
+    width, size, walls, border = frame(mat)
+    src = width + 1
+    dest = size - width - 2
+    if src == dest:
+        return 1
+
+    sides = []
+    for start in (src, dest):
+        dist = array('i', [-b for b in border]) * 2
+        dist[start] = dist[size + start] = 1
+        sides.append([dist, [walls[start] * size + start], 1])
+
+    best = None
+    expanded = 0
+    while sides[0][1] and sides[1][1] and (best is None or best > sides[0][2] + sides[1][2] - 1):
+        side, other = sides if len(sides[0][1]) <= len(sides[1][1]) else sides[::-1]
+        dist, frontier, depth = side
+        other_dist = other[0]
+        depth += 1
+        expanded += len(frontier)
+
+        next_frontier = []
+        for state in frontier:
+            layer, cell = (1, state - size) if state >= size else (0, state)
+            for adj in (cell - width, cell + width, cell - 1, cell + 1):
+                if layer == 0:
+                    if dist[adj]:
+                        continue
+                    dist[adj] = depth
+                    if not dist[size + adj]:
+                        dist[size + adj] = depth
+                    # move up to layer 1 when hitting a wall
+                    next_frontier.append(walls[adj] * size + adj)
+                else:
+                    if walls[adj] or dist[size + adj]:
+                        continue
+                    dist[size + adj] = depth
+                    next_frontier.append(size + adj)
+
+                if walls[adj]:
+                    pairs = ((dist[size + adj], other_dist[size + adj]),)
+                else:
+                    pairs = ((dist[adj], other_dist[size + adj]), (dist[size + adj], other_dist[adj]))
+                for a, b in pairs:
+                    if a > 0 and b > 0 and (best is None or a + b - 1 < best):
+                        best = a + b - 1
+
+        side[1], side[2] = next_frontier, depth
+
+    if stats is not None:
+        stats['expanded'] = expanded
+    return best
+
+
+def astar_solution(mat, stats=None):
+    """
+    astar_solution is an A* search over the two-layer graph of compact_solution,
+    guided by the manhattan distance to the destination (admissible and consistent,
+    as every step moves by exactly one cell).
+
+    A state (cell, layer 1) is dominated and skipped, if the cell has been reached in
+    layer 0 with at most the same distance. Ties are broken towards the larger distance
+    from src, i.e. towards the destination.
+
+    See compact_solution for `stats`.
+    """
+    width, size, walls, border = frame(mat)
+    src = width + 1
+    dest = size - width - 2
+    dest_row, dest_col = divmod(dest, width)
+
+    # best known distance per state, border states are never entered
+    unknown = 2 * size
+    dist = array('i', [-1 if b else unknown for b in border]) * 2
+    start = walls[src] * size + src
+    dist[start] = 1
+
+    heap = [(1 + abs(dest_row - src // width) + abs(dest_col - src % width), -1, start)]
+    expanded = 0
+    while heap:
+        _, g, state = heappop(heap)
+        g = -g
+        layer, cell = (1, state - size) if state >= size else (0, state)
+        if g > dist[state] or (layer and 0 < dist[cell] <= g and not walls[cell]):
+            continue
+        expanded += 1
+        if cell == dest:
+            if stats is not None:
+                stats['expanded'] = expanded
+            return g
+
+        for adj in (cell - width, cell + width, cell - 1, cell + 1):
+            adj_layer = layer + walls[adj]
+            if adj_layer > 1:
+                continue
+            adj_state = adj_layer * size + adj
+            if not g + 1 < dist[adj_state]:
+                continue
+            if adj_layer and not walls[adj] and 0 < dist[adj] <= g + 1:
+                continue
+            dist[adj_state] = g + 1
+            row, col = divmod(adj, width)
+            heappush(heap, (g + 1 + abs(dest_row - row) + abs(dest_col - col), -(g + 1), adj_state))
+
+    if stats is not None:
+        stats['expanded'] = expanded
+
+
+def layered_solution(mat, k=1, path=False, prune=False):
+    """
+    layered_solution generalizes compact_solution to at most `k` wall removals.
+
+    Graphs:
+        - layer j represents paths, where exactly j walls have been hit (j = 0..k).
+        - from layer j < k hitting a wall moves up to layer j + 1, layer k ignores walls.
+
+    Marking nodes as visited
+        - node discovered in layer j -> mark visited for layers j..k
+          (as it is strictly better to discover a node with fewer walls hit first)
+          i.e. every one of the (k + 1) * h * w states is visited once: O(k * h * w).
+
+    With `prune` only the best remaining budget per cell is kept instead of a visited flag
+    per layer and cell: a cell is only entered again if more budget is left than on every
+    (shorter or equally long) path before. Memory is O(h * w) plus the states actually
+    discovered, i.e. independent of k on open grids (every cell is discovered once).
+
+    The search stops as soon as the destination is discovered.
+
+    arguments:
+    mat -- a map of a maze, see point_solution
+    k -- number of walls that may be removed
+    path -- also return the path as list of (row, col) from src to destination
+    prune -- best-remaining-budget-per-cell mode
+
+    returns:
+    number of steps (incl. src and destination) or (steps, path); None if there is no path
+    """
+    width, size, walls, border = frame(mat)
+    src = width + 1
+    dest = size - width - 2
+
+    if prune:
+        return pruned_search(walls, border, width, src, dest, k, path)
+
+    visited = border * (k + 1)
+    predecessor = array('i', [-1]) * ((k + 1) * size) if path else None
+    queue = array('i', [0]) * ((k + 1) * size)
+    queue[0] = src
+    visited[src] = 1
+    final = src if src == dest else None
+
+    head, tail, dist = 0, 1, 1
+    while head < tail and final is None:
+        level_end = tail
+        dist += 1
+        while head < level_end and final is None:
+            state = queue[head]
+            head += 1
+            layer, cell = divmod(state, size)
+            for adj in (cell - width, cell + width, cell - 1, cell + 1):
+                adj_layer = layer + walls[adj]
+                adj_state = adj_layer * size + adj
+                if adj_layer > k or visited[adj_state]:
+                    continue
+                for j in range(adj_state, (k + 1) * size, size):
+                    if visited[j]:
+                        break
+                    visited[j] = 1
+                if path:
+                    predecessor[adj_state] = state
+                if adj == dest:
+                    final = adj_state
+                    break
+                queue[tail] = adj_state
+                tail += 1
+
+    if final is None:
+        return (None, None) if path else None
+    if final == src:
+        dist = 1
+    if not path:
+        return dist
+
+    states = [final]
+    while predecessor[states[-1]] >= 0:
+        states.append(predecessor[states[-1]])
+    return dist, to_coordinates([state % size for state in reversed(states)], width)
+
+
+def pruned_search(walls, border, width, src, dest, k, path):
+    # best[cell]: most budget left any discovered path to cell had, border cells are never entered
+    best = array('i', [k if b else -1 for b in border])
+    best[src] = k
+
+    # discovered states in BFS order (serves as queue), parents[i]: index of the predecessor of state i
+    cells, budgets, parents = array('i', [src]), array('i', [k]), array('i', [-1])
+    final = 0 if src == dest else None
+
+    head, dist = 0, 1
+    while head < len(cells) and final is None:
+        level_end = len(cells)
+        dist += 1
+        while head < level_end and final is None:
+            cell, budget = cells[head], budgets[head]
+            head += 1
+            for adj in (cell - width, cell + width, cell - 1, cell + 1):
+                adj_budget = budget - walls[adj]
+                if adj_budget <= best[adj]:
+                    continue
+                best[adj] = adj_budget
+                cells.append(adj)
+                budgets.append(adj_budget)
+                if path:
+                    parents.append(head - 1)
+                if adj == dest:
+                    final = len(cells) - 1
+                    break
+
+    if final is None:
+        return (None, None) if path else None
+    if final == 0:
+        dist = 1
+    if not path:
+        return dist
+
+    states = [final]
+    while parents[states[-1]] >= 0:
+        states.append(parents[states[-1]])
+    return dist, to_coordinates([cells[i] for i in reversed(states)], width)
+
+
+class LRUCache(object):
+    """
+    LRUCache is a dict of at most `capacity` entries, evicting the least recently used one.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        if key not in self.data:
+            self.misses += 1
+            return default
+        self.hits += 1
+        value = self.data.pop(key)
+        self.data[key] = value
+        return value
+
+    def put(self, key, value):
+        self.data.pop(key, None)
+        self.data[key] = value
+        if len(self.data) > self.capacity:
+            self.data.popitem(last=False)
+
+
+class Maze(object):
+    """
+    Maze answers "shortest path with at most one wall removed" for arbitrary source/target pairs.
+
+    For every endpoint a wall-free (layer 0) distance field is computed once by BFS.
+    Every path through exactly one wall c consists of a wall-free path from source to a neighbour
+    of c, the wall itself and a wall-free path from a neighbour of c to target, hence
+        steps(source, target) = min(field_source[target],
+                                    min over walls c (near_source[c] + near_target[c] + 1))
+    with near[c] being the distance to the closest neighbour of wall c.
+    Per endpoint only the near array over all walls is kept (and the distance to every cell),
+    so once both fields are known a query costs O(number of walls).
+
+    Fields are kept per maze in an LRUCache of `fields` entries, query results in the module
+    wide `queries` LRUCache keyed by the content hash of the maze.
+    """
+
+    def __init__(self, mat, fields=64):
+        self.h, self.w = (len(mat), len(mat[0]))
+        self.width, self.size, self.walls, border = frame(mat)
+        self.blocked = bytearray(b | wall for b, wall in zip(border, self.walls))
+        self.wall_cells = array('i', [cell for cell in range(self.size) if self.walls[cell]])
+        self.key = content_hash(mat)
+        self.fields = LRUCache(fields)
+
+    def field(self, cell):
+        """wall-free distances from `cell` to every cell and to the closest neighbour of every wall (0: unreachable)"""
+        field = self.fields.get(cell)
+        if field is not None:
+            return field
+
+        width = self.width
+        dist = array('i', [0]) * self.size
+        visited = bytearray(self.blocked)
+        queue = array('i', [0]) * self.size
+        queue[0] = cell
+        dist[cell] = 1
+        visited[cell] = 1
+        head, tail = 0, 1
+        while head < tail:
+            current = queue[head]
+            head += 1
+            for adj in (current - width, current + width, current - 1, current + 1):
+                if not visited[adj]:
+                    visited[adj] = 1
+                    dist[adj] = dist[current] + 1
+                    queue[tail] = adj
+                    tail += 1
+
+        near = array('i', [0]) * len(self.wall_cells)
+        for k, wall in enumerate(self.wall_cells):
+            reached = [d for d in (dist[wall - width], dist[wall + width], dist[wall - 1], dist[wall + 1]) if d]
+            if reached:
+                near[k] = min(reached)
+
+        field = (dist, near)
+        self.fields.put(cell, field)
+        return field
+
+    def shortest_path(self, source=(0, 0), target=None):
+        """
+        number of steps (incl. source and target) from `source` to `target` (row, col; default h-1,w-1)
+        going through at most one wall, None if there is no such path. Both endpoints must be passable.
+        """
+        if target is None:
+            target = (self.h - 1, self.w - 1)
+        # paths are undirected
+        key = (self.key,) + tuple(sorted((tuple(source), tuple(target))))
+        steps = queries.get(key, False)
+        if steps is not False:
+            return steps
+
+        src, dest = to_cell(source, self.width), to_cell(target, self.width)
+        if self.blocked[src] or self.blocked[dest]:
+            raise ValueError('Endpoints need to be passable cells: {}, {}'.format(source, target))
+
+        source_dist, source_near = self.field(src)
+        _, target_near = self.field(dest)
+        candidates = [a + b + 1 for a, b in zip(source_near, target_near) if a and b]
+        if source_dist[dest]:
+            candidates.append(source_dist[dest])
+        steps = min(candidates) if candidates else None
+
+        queries.put(key, steps)
+        return steps
+
+
+# query results of all mazes by (maze content hash, source, target)
+queries = LRUCache(4096)
+# Maze objects by content hash
+mazes = LRUCache(16)
+
+
+def content_hash(mat):
+    digest = hashlib.sha1('{}x{}:'.format(len(mat), len(mat[0])).encode())
+    for row in mat:
+        digest.update(bytes(bytearray(row)))
+    return digest.hexdigest()
+
+
+def get_maze(mat):
+    """returns the cached Maze of `mat` (by content hash), creating it if necessary"""
+    key = content_hash(mat)
+    maze = mazes.get(key)
+    if maze is None:
+        maze = Maze(mat)
+        mazes.put(key, maze)
+    return maze
+
+
+def solution(mat, method='compact'):
+    """
+    solution returns the number of steps of the shortest path from 0,0 to h-1,w-1
+    (incl. src and destination), while going through at most one wall.
+
+    arguments:
+    mat -- a map of a maze, see point_solution
+    method -- 'compact' (default): flat array based BFS, see compact_solution
+              'bidirectional': BFS from both ends, see bidirectional_solution
+              'astar': A* search, see astar_solution
+              'points': BFS on Point/Node objects, see point_solution
+    """
+    if method == 'compact':
+        return compact_solution(mat)
+    if method == 'bidirectional':
+        return bidirectional_solution(mat)
+    if method == 'astar':
+        return astar_solution(mat)
+    if method == 'points':
+        return point_solution(mat)
+    raise ValueError('Invalid method: {}'.format(method))
+
+
 if __name__ == "__main__":
+    methods = ('compact', 'bidirectional', 'astar', 'points')
+
     mat = [
         [0, 1, 1, 0],
         [0, 0, 0, 1],
         [1, 1, 0, 0],
         [1, 1, 1, 0]
     ]
-    assert solution(mat) == 7
+    assert [solution(mat, method) for method in methods] == [7] * len(methods)
 
     mat = [
         [0, 0, 0, 0, 0, 0],
@@ -118,7 +617,7 @@ if __name__ == "__main__":
         [0, 1, 1, 1, 1, 1],
         [0, 0, 0, 0, 0, 0],
     ]
-    assert solution(mat) == 11
+    assert [solution(mat, method) for method in methods] == [11] * len(methods)
 
     mat = [
         [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
@@ -137,7 +636,9 @@ if __name__ == "__main__":
         [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
         [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
     ]
-    assert solution(mat) == 29
+    assert [solution(mat, method) for method in methods] == [29] * len(methods)
+    assert layered_solution(mat, k=0) == layered_solution(mat, k=0, prune=True) is None
+    assert layered_solution(mat, k=3) == layered_solution(mat, k=3, prune=True) == 29
 
     mat = [
         [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
@@ -157,7 +658,7 @@ if __name__ == "__main__":
         [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
         [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
     ]
-    assert solution(mat) == 31
+    assert [solution(mat, method) for method in methods] == [31] * len(methods)
 
     mat = [
         [0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0],
@@ -181,7 +682,17 @@ if __name__ == "__main__":
         [0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 1, 0, 1, 0, 0, 0],
         [0, 0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 0],
     ]
-    assert solution(mat) == 47
+    assert [solution(mat, method) for method in methods] == [47] * len(methods)
+    maze = get_maze(mat)
+    assert maze.shortest_path() == 47 and get_maze(mat) is maze
+    for source, target in (((0, 0), (19, 0)), ((5, 7), (14, 14)), ((19, 15), (0, 15))):
+        assert maze.shortest_path(source, target) == compact_solution(mat, source=source, target=target)
+    assert [layered_solution(mat, k) for k in range(4)] == [layered_solution(mat, k, prune=True) for k in range(4)]
+    assert layered_solution(mat, k=1) == 47
 
     mat = [[0, 1], [1, 0]]
-    assert solution(mat) == 3
\ No newline at end of file
+    assert [solution(mat, method) for method in methods] == [3] * len(methods)
+    assert layered_solution(mat, k=1, path=True) == layered_solution(mat, k=1, path=True, prune=True) == (
+        3, [(0, 0), (1, 0), (1, 1)]
+    )
+    assert layered_solution(mat, k=0) is layered_solution(mat, k=0, prune=True) is None
@@ -0,0 +1,87 @@
+from __future__ import division, print_function
+
+import random
+import sys
+import time
+
+from solution import LRUCache, batch_solution, bit_solution, parse, range_solution, runs_solution, string_solution
+
+
+def timed(f, *args):
+    start = time.time()
+    result = f(*args)
+    return result, time.time() - start
+
+
+def run(sizes=(300, 3000, 30000, 10 ** 5, 10 ** 6), max_string=30000, max_bits=10 ** 5):
+    """
+    random decimal inputs of `sizes` digits, parse vs int(str) for the conversion and
+    the three engines (string_solution only up to `max_string`, bit_solution up to `max_bits` digits)
+    """
+    if hasattr(sys, 'set_int_max_str_digits'):
+        sys.set_int_max_str_digits(0)
+    rnd = random.Random(0)
+    print('{:>8} {:>10} {:>10} {:>10} {:>10} {:>10}'.format('digits', 'int(str)', 'parse', 'string', 'bits', 'runs'))
+    for digits in sizes:
+        s = str(rnd.randint(1, 9)) + ''.join(rnd.choice('0123456789') for _ in range(digits - 1))
+        row = []
+        n, elapsed = timed(int, s)
+        row.append(elapsed)
+        parsed, elapsed = timed(parse, s)
+        assert parsed == n
+        row.append(elapsed)
+
+        results = set()
+        for engine, limit in ((string_solution, max_string), (bit_solution, max_bits), (runs_solution, None)):
+            if limit is not None and digits > limit:
+                row.append(None)
+                continue
+            result, elapsed = timed(engine, s if engine is string_solution else n)
+            results.add(result)
+            row.append(elapsed)
+        assert len(results) == 1
+        print('{:>8} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+            digits, *['-' if t is None else '{:.4f}s'.format(t) for t in row]
+        ))
+
+
+def run_batch(digits=300, count=10 ** 5, capacities=(1 << 10, 1 << 14, 1 << 18)):
+    """
+    throughput of `count` consecutive `digits` digit values with runs_solution per value
+    against range_solution, and the cache hit rate per cache capacity
+    """
+    start = 10 ** (digits - 1) + random.Random(0).randrange(10 ** (digits - 1))
+    expected, t_single = timed(lambda: [runs_solution(n) for n in range(start, start + count)])
+    print('{} consecutive {} digit values'.format(count, digits))
+    print('{:>10} {:>10} {:>12} {:>10}'.format('capacity', 'time', 'values/s', 'hit rate'))
+    print('{:>10} {:>9.3f}s {:>12.0f} {:>10}'.format('-', t_single, count / t_single, '-'))
+    for capacity in capacities:
+        cache = LRUCache(capacity)
+        result, elapsed = timed(range_solution, start, start + count, cache)
+        assert result == expected
+        print('{:>10} {:>9.3f}s {:>12.0f} {:>10.1%}'.format(
+            capacity, elapsed, count / elapsed, cache.hits / max(1, cache.hits + cache.misses)
+        ))
+
+
+def run_pool(digits=3000, count=2000, workers=(1, 2, 4)):
+    """
+    throughput of batch_solution on `count` random `digits` digit strings by number of worker processes,
+    without cache as these values share no states
+    """
+    rnd = random.Random(0)
+    values = [str(rnd.randint(10 ** (digits - 1), 10 ** digits - 1)) for _ in range(count)]
+    expected, t_serial = timed(batch_solution, values, None)
+    print('{} random {} digit values'.format(count, digits))
+    print('{:>8} {:>10} {:>12}'.format('workers', 'time', 'values/s'))
+    print('{:>8} {:>9.3f}s {:>12.0f}'.format('-', t_serial, count / t_serial))
+    for processes in workers:
+        result, elapsed = timed(lambda: batch_solution(values, None, processes))
+        assert result == expected
+        print('{:>8} {:>9.3f}s {:>12.0f}'.format(processes, elapsed, count / elapsed))
+
+
+if __name__ == '__main__':
+    run()
+    run_batch()
+    run_pool()
@@ -1,10 +1,14 @@
+from collections import OrderedDict
+from multiprocessing import Pool
+
+
 def trailing_zeros(s):
     return len(s) - len(s.rstrip('0'))
 
 
-def solution(n):
+def string_solution(n):
     """
-    solution uses binary representation of the n and the fact that
+    string_solution uses binary representation of the n and the fact that
     the number of trailing zeros (in binary) represents the number of
     times we can divide n by 2.
     When there are no trailing zeros (i.e. n is not divisible by 2),
@@ -38,5 +42,198 @@ def solution(n):
     return steps
 
 
+def parse(digits, cutoff=1000):
+    """
+    parse converts a decimal string to int in sub-quadratic time (int(str) is quadratic and
+    limited to 4300 digits on recent Pythons), by splitting the string in halves:
+        int(high + low) = int(high) * 10^len(low) + int(low)
+    """
+    powers = {}
+
+    def convert(s):
+        if len(s) <= cutoff:
+            return int(s)
+        half = len(s) // 2
+        if half not in powers:
+            powers[half] = 10 ** half
+        return convert(s[:-half]) * powers[half] + convert(s[-half:])
+
+    return convert(digits.strip())
+
+
+def bit_solution(n):
+    """
+    bit_solution is string_solution on integer bit operations only:
+        - n & -n is the lowest set bit, i.e. its bit_length - 1 the number of trailing zeros
+        - (n + 1) & -(n + 1) the same for the trailing ones of n
+    For odd n, n + 1 has more trailing zeros than n - 1 exactly if n ends in at least two ones
+    (n - 1 of such n ends in 10), so the trailing ones decide alone (except for n == 3).
+    """
+    steps = 0
+    while n > 3:
+        if not n & 1:
+            zeros = (n & -n).bit_length() - 1
+            n >>= zeros
+            steps += zeros
+        elif n & 2:
+            # at least two trailing ones: add a pellet, the run of ones turns into zeros
+            n += 1
+            steps += 1
+        else:
+            n -= 1
+            steps += 1
+    return steps + (0, 0, 1, 2)[n]
+
+
+def runs_solution(n):
+    """
+    runs_solution is string_solution in a single pass over the binary representation
+    (least significant bit first), jumping from one run of ones to the next.
+
+    With `ones` the number of trailing ones (after dividing by all trailing zeros),
+    followed by `zeros` zeros and the next run of `next_ones` ones:
+        - ones >= 2: add a pellet and divide `ones` times, the carry makes the zero above the
+          run a one, which merges with the next run if zeros == 1.
+        - ones == 1: remove a pellet and divide 1 + zeros times, continue with the next run.
+    Everything above the current run is untouched, so every run is visited once: O(bits).
+    """
+    if n < 2:
+        return 0
+    bits = bin(n)[:1:-1]
+    length = len(bits)
+
+    i = bits.find('1')
+    end = bits.find('0', i)
+    ones = (length if end == -1 else end) - i
+    steps = i
+    while True:
+        j = i + ones
+        if j == length:
+            # n == 2^ones - 1
+            if ones == 1:
+                return steps
+            if ones == 2:
+                return steps + 2
+            return steps + 1 + ones
+
+        k = bits.find('1', j)
+        end = bits.find('0', k)
+        next_ones = (length if end == -1 else end) - k
+        zeros = k - j
+        if ones >= 2:
+            steps += 1 + ones
+            i = j
+            ones = 1 + next_ones if zeros == 1 else 1
+        else:
+            steps += 2 + zeros
+            i = k
+            ones = next_ones
+
+
+def solution(n):
+    return runs_solution(parse(n) if isinstance(n, str) else int(n))
+
+
+class LRUCache(object):
+    """
+    LRUCache is a dict of at most `capacity` entries, evicting the least recently used one.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        if key not in self.data:
+            self.misses += 1
+            return default
+        self.hits += 1
+        value = self.data.pop(key)
+        self.data[key] = value
+        return value
+
+    def put(self, key, value):
+        self.data.pop(key, None)
+        self.data[key] = value
+        if len(self.data) > self.capacity:
+            self.data.popitem(last=False)
+
+
+# steps of intermediate states, shared by all memo_solution calls of this process
+cache = LRUCache(1 << 18)
+
+
+def memo_solution(n, cache=cache):
+    """
+    memo_solution is bit_solution, remembering the remaining steps of every state it passes.
+    Related n (e.g. consecutive ones, or ones sharing their high-order bits) quickly reduce
+    to the same states, from where the cached steps are reused.
+    """
+    path = []
+    steps = 0
+    while n > 3:
+        known = cache.get(n)
+        if known is not None:
+            steps += known
+            break
+        path.append((n, steps))
+        if not n & 1:
+            zeros = (n & -n).bit_length() - 1
+            n >>= zeros
+            steps += zeros
+        else:
+            n += 1 if n & 2 else -1
+            steps += 1
+    else:
+        steps += (0, 0, 1, 2)[n]
+
+    for state, before in path:
+        cache.put(state, steps - before)
+    return steps
+
+
+def batch_worker(value):
+    return memo_solution(parse(value) if isinstance(value, str) else int(value))
+
+
+def batch_solution(values, cache=cache, processes=None, chunksize=64):
+    """
+    batch_solution returns the steps of every value (ints or decimal strings).
+
+    arguments:
+    cache -- LRUCache shared by the whole batch (and later batches), None for unrelated values:
+             a state of one random big integer hardly ever reappears, and memo_solution walks
+             the bits one step at a time while runs_solution takes one pass over the runs
+    processes -- spread the batch over a pool of that many processes (each with its own cache),
+                 worth it for large batches of big integers
+    chunksize -- values sent to a process at once; consecutive values share most of their states
+    """
+    if processes:
+        pool = Pool(processes)
+        try:
+            return pool.map(solution if cache is None else batch_worker, values, chunksize)
+        finally:
+            pool.close()
+            pool.join()
+    if cache is None:
+        return [solution(value) for value in values]
+    return [memo_solution(parse(value) if isinstance(value, str) else int(value), cache) for value in values]
+
+
+def range_solution(start, stop, cache=cache, processes=None):
+    """steps of every n in [start, stop), see batch_solution"""
+    values = []
+    n = start
+    while n < stop:
+        values.append(n)
+        n += 1
+    return batch_solution(values, cache, processes)
+
+
 assert solution('15') == 5
 assert solution('4') == 2
+assert all(runs_solution(n) == bit_solution(n) == string_solution(n) for n in range(1, 4096))
+assert parse('1' * 5000) == (10 ** 5000 - 1) // 9
+assert range_solution(1, 4096) == [string_solution(n) for n in range(1, 4096)] and cache.hits
@@ -0,0 +1,85 @@
+from __future__ import print_function
+
+import random
+import time
+
+from solution import DeadlockGraph, edmonds_matching, greedy_matching, is_dead_lock, maximum_matching
+
+
+def timed(f, *args):
+    start = time.time()
+    result = f(*args)
+    return result, time.time() - start
+
+
+def random_adjacency(n, degree, seed=0):
+    """adjacency lists of a random graph with n vertices and n * degree / 2 edges"""
+    rnd = random.Random(seed)
+    neighbours = [set() for _ in range(n)]
+    for _ in range(n * degree // 2):
+        a, b = rnd.randrange(n), rnd.randrange(n)
+        if a != b:
+            neighbours[a].add(b)
+            neighbours[b].add(a)
+    return [sorted(v) for v in neighbours]
+
+
+def run(sizes=(100, 300, 1000, 3000, 10000), degrees=(2, 3, 10), max_dfs=300):
+    """unmatched vertices and time of edmonds_matching and maximum_matching (up to `max_dfs` vertices)"""
+    print('{:>8} {:>7} {:>10} {:>10} {:>10} {:>10}'.format('vertices', 'degree', 'blossom', 'time', 'dfs', 'time'))
+    for n in sizes:
+        for degree in degrees:
+            lists = random_adjacency(n, degree)
+            mate, t_blossom = timed(edmonds_matching, lists)
+            row = [mate.count(-1), '{:.3f}s'.format(t_blossom), '-', '-']
+            if n <= max_dfs:
+                graph = [[0] * n for _ in range(n)]
+                for v, neighbours in enumerate(lists):
+                    for u in neighbours:
+                        graph[v][u] = 1
+                unmatched, t_dfs = timed(maximum_matching, graph)
+                assert unmatched >= row[0]
+                row[2:] = [unmatched, '{:.3f}s'.format(t_dfs)]
+            print('{:>8} {:>7} {:>10} {:>10} {:>10} {:>10}'.format(n, degree, *row))
+
+
+def run_guards(sizes=(100, 300, 1000, 3000, 10000), max_lists=3000, max_dfs=100):
+    """
+    deadlock graphs of random banana lists (up to 2^30 - 1 bananas): construction of Python adjacency lists
+    (up to `max_lists` guards) and of a DeadlockGraph, and matching on the DeadlockGraph
+    """
+    rnd = random.Random(0)
+    print('{:>8} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+        'guards', 'lists', 'bitsets', 'blossom', 'unmatched', 'dfs'
+    ))
+    for n in sizes:
+        bananas = [rnd.randint(1, 2 ** 30 - 1) for _ in range(n)]
+        graph, t_bitsets = timed(DeadlockGraph, bananas)
+        mate, t_blossom = timed(lambda: edmonds_matching(graph, greedy_matching(graph, graph.degrees)))
+        row = ['-', '{:.3f}s'.format(t_bitsets), '{:.3f}s'.format(t_blossom), mate.count(-1), '-']
+        if n <= max_lists:
+            lists, t_lists = timed(lambda: [[j for j, y in enumerate(bananas) if is_dead_lock(x, y)] for x in bananas])
+            assert lists == [graph[v] for v in range(n)]
+            row[0] = '{:.3f}s'.format(t_lists)
+        if n <= max_dfs:
+            graph = [[is_dead_lock(x, y) for y in bananas] for x in bananas]
+            unmatched, elapsed = timed(maximum_matching, graph)
+            assert unmatched >= mate.count(-1)
+            row[4] = '{:.3f}s'.format(elapsed)
+        print('{:>8} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(n, *row))
+
+
+def run_duplicates(n=10000, distinct=(10, 100, 1000, 10000)):
+    """DeadlockGraph construction for `n` guards sharing `distinct` banana counts"""
+    rnd = random.Random(0)
+    print('{:>8} {:>10} {:>10}'.format('distinct', 'bitsets', 'kB'))
+    for k in distinct:
+        counts = [rnd.randint(1, 2 ** 30 - 1) for _ in range(k)]
+        graph, elapsed = timed(DeadlockGraph, [rnd.choice(counts) for _ in range(n)])
+        print('{:>8} {:>9.3f}s {:>10.0f}'.format(k, elapsed, graph.bits.nbytes / 1024))
+
+
+if __name__ == '__main__':
+    run()
+    run_guards()
+    run_duplicates()
@@ -1,4 +1,15 @@
-from fractions import gcd
+import random
+from collections import deque
+
+try:
+    from math import gcd
+except ImportError:
+    from fractions import gcd
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 def is_dead_lock(a, b):
@@ -6,9 +17,176 @@ def is_dead_lock(a, b):
     return not (sm & (sm - 1)) == 0
 
 
-def solution(banana_list):
+def solution(banana_list, method='blossom'):
+    """
+    arguments:
+    method -- 'blossom' for edmonds_matching on adjacency lists (of a DeadlockGraph if numpy is available),
+              'dfs' for the augmenting path search of maximum_matching on the full matrix
+    """
+    if method == 'blossom' and np is not None:
+        graph = DeadlockGraph(banana_list)
+        return edmonds_matching(graph, greedy_matching(graph, graph.degrees)).count(-1)
     pairs = [[is_dead_lock(x, y) for y in banana_list] for x in banana_list]
-    return maximum_matching(pairs)
+    if method == 'blossom':
+        return edmonds_matching(adjacency(pairs)).count(-1)
+    if method == 'dfs':
+        return maximum_matching(pairs)
+    raise ValueError('Invalid method: {}'.format(method))
+
+
+class DeadlockGraph(object):
+    """
+    DeadlockGraph are the adjacency lists of the deadlock graph of `banana_list`, as taken by edmonds_matching,
+    built with numpy. Guards with the same number of bananas share one row: the deadlock test is only
+    evaluated for the upper triangle of the distinct counts (vectorized gcd and power of two test per row),
+    packed row by row into one bitset per distinct count and mirrored bit by bit, i.e. 1/8 byte per pair
+    (the dense k x k matrix is never built).
+    Neighbour lists are unpacked on access.
+
+    attributes:
+    groups -- index of the banana count of each guard among the distinct counts
+    bits -- packed rows, bit b of bits[a] is set if the distinct counts a and b deadlock
+    degrees -- number of neighbours of each guard
+    """
+
+    def __init__(self, banana_list):
+        if np is None:
+            raise ImportError('DeadlockGraph requires numpy')
+        values, groups = np.unique(np.asarray(banana_list, dtype=np.int64), return_inverse=True)
+        groups = groups.ravel()
+        k = len(values)
+        counts = np.bincount(groups, minlength=k)
+        degrees = np.zeros(k, dtype=np.int64)
+        bits = np.zeros((k, (k + 7) // 8), dtype=np.uint8)
+        for a in range(k - 1):
+            y = values[a + 1:]
+            sm = (values[a] + y) // np.gcd(values[a], y)
+            row = (sm & (sm - 1)) != 0
+            # packed from column a + 1 on, the leading bits of its byte may hold mirrored bits already
+            packed = np.packbits(np.concatenate((np.zeros((a + 1) & 7, dtype=bool), row)))
+            bits[a, (a + 1) >> 3:] |= packed
+            bits[a + 1:][row, a >> 3] |= 0x80 >> (a & 7)
+            degrees[a] += counts[a + 1:][row].sum()
+            degrees[a + 1:][row] += counts[a]
+        self.size = k
+        self.groups = groups
+        self.degrees = degrees[groups].tolist()
+        self.bits = bits
+
+    def __len__(self):
+        return len(self.groups)
+
+    def __getitem__(self, v):
+        row = np.unpackbits(self.bits[self.groups[v]], count=self.size).astype(bool)
+        return np.flatnonzero(row[self.groups]).tolist()
+
+
+def adjacency(graph):
+    """adjacency lists of the nxn matrix `graph`, as taken by edmonds_matching"""
+    return [[j for j, edge in enumerate(row) if edge and j != i] for i, row in enumerate(graph)]
+
+
+def greedy_matching(adjacency, degrees=None):
+    """
+    mate[v] of a maximal matching: every vertex takes its first unmatched neighbour,
+    least connected vertices first as they have the fewest alternatives.
+    degrees are len(adjacency[v]), if already known
+    """
+    if degrees is None:
+        degrees = [len(neighbours) for neighbours in adjacency]
+    mate = [-1] * len(adjacency)
+    for v in sorted(range(len(adjacency)), key=degrees.__getitem__):
+        if mate[v] == -1:
+            for u in adjacency[v]:
+                if mate[u] == -1:
+                    mate[u], mate[v] = v, u
+                    break
+    return mate
+
+
+def edmonds_matching(adjacency, mate=None):
+    """
+    Edmonds Blossom Algorithm: maximum matching of a general graph, O(|V|^3).
+    maximum_matching does not contract blossoms (odd cycles), so its augmenting path search
+    can miss a path that leaves a blossom through another vertex than it entered, and the
+    deadlock graphs are full of odd cycles.
+    Starting from a greedy matching leaves only a few vertices to grow a search tree from,
+    and a vertex without augmenting path stays without one, so every vertex is a root at most once.
+    :param adjacency: adjacency lists, i.e. adjacency[v] are the neighbours of v
+    :param mate: matching to start from, mate[v] is the vertex matched to v or -1
+    :return: mate of a maximum matching
+    """
+    mate = greedy_matching(adjacency) if mate is None else list(mate)
+    for root in range(len(adjacency)):
+        if mate[root] == -1:
+            augment(adjacency, mate, root)
+    return mate
+
+
+def augment(adjacency, mate, root):
+    """
+    grows an alternating tree from the unmatched `root` breadth first, contracting blossoms into
+    their base, and flips the first augmenting path found in `mate`.
+    Even vertices are the root and the mates of odd ones, parent[u] is the even vertex that reached odd u.
+    :return: whether an augmenting path was found
+    """
+    n = len(adjacency)
+    base = list(range(n))
+    parent = [-1] * n
+    even = [False] * n
+    even[root] = True
+    queue = deque([root])
+
+    def common_base(a, b):
+        # first base shared by the tree paths of a and b to the root
+        seen = [False] * n
+        while True:
+            a = base[a]
+            seen[a] = True
+            if mate[a] == -1:
+                break
+            a = parent[mate[a]]
+        while not seen[base[b]]:
+            b = parent[mate[base[b]]]
+        return base[b]
+
+    def mark_blossom(v, b, child, blossom):
+        # walks from v up to the base b, pointing odd vertices back into the blossom
+        while base[v] != b:
+            blossom[base[v]] = blossom[base[mate[v]]] = True
+            parent[v] = child
+            child = mate[v]
+            v = parent[mate[v]]
+
+    while queue:
+        v = queue.popleft()
+        for u in adjacency[v]:
+            if base[v] == base[u] or mate[v] == u:
+                continue
+            if u == root or mate[u] != -1 and parent[mate[u]] != -1:
+                # u is even as well: the edge closes an odd cycle
+                b = common_base(v, u)
+                blossom = [False] * n
+                mark_blossom(v, b, u, blossom)
+                mark_blossom(u, b, v, blossom)
+                for i in range(n):
+                    if blossom[base[i]]:
+                        base[i] = b
+                        if not even[i]:
+                            even[i] = True
+                            queue.append(i)
+            elif parent[u] == -1:
+                parent[u] = v
+                if mate[u] == -1:
+                    while u != -1:
+                        v = parent[u]
+                        w = mate[v]
+                        mate[u], mate[v] = v, u
+                        u = w
+                    return True
+                even[mate[u]] = True
+                queue.append(mate[u])
+    return False
 
 
 def maximum_matching(graph):
@@ -106,3 +284,58 @@ def symmetric_addition(lst, i, j):
 
 assert solution([1, 1]) == 2
 assert solution([1, 7, 3, 21, 13, 19]) == 0
+
+
+def brute_force_unmatched(adjacency, v=0, matched=frozenset()):
+    # fewest unmatched vertices among v.. by trying every partner of v, for small graphs only
+    while v < len(adjacency) and v in matched:
+        v += 1
+    if v == len(adjacency):
+        return 0
+    best = 1 + brute_force_unmatched(adjacency, v + 1, matched)
+    for u in adjacency[v]:
+        if u > v and u not in matched:
+            best = min(best, brute_force_unmatched(adjacency, v + 1, matched | frozenset((u,))))
+    return best
+
+
+def random_graph(n, density, rnd):
+    graph = [[0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            if rnd.random() < density:
+                graph[i][j] = graph[j][i] = 1
+    return graph
+
+
+assert solution([1, 1], method='dfs') == 2
+assert solution([1, 7, 3, 21, 13, 19], method='dfs') == 0
+# a triangle 0-1-2 with a tail 2-3-4-5 at 2 and a tail 0-6 at 0: matching 1-2, 3-4 leaves 0, 5, 6
+# with the only augmenting path 6-0-1-2-3-4-5 running through the blossom
+assert edmonds_matching(adjacency([
+    [0, 1, 1, 0, 0, 0, 1],
+    [1, 0, 1, 0, 0, 0, 0],
+    [1, 1, 0, 1, 0, 0, 0],
+    [0, 0, 1, 0, 1, 0, 0],
+    [0, 0, 0, 1, 0, 1, 0],
+    [0, 0, 0, 0, 1, 0, 0],
+    [1, 0, 0, 0, 0, 0, 0],
+]), mate=[-1, 2, 1, 4, 3, -1, -1]).count(-1) == 1
+
+# randomized equivalence: edmonds_matching is optimal, the reference is never better
+rnd = random.Random(0)
+for _ in range(300):
+    graph = random_graph(rnd.randint(1, 10), rnd.random(), rnd)
+    mate = edmonds_matching(adjacency(graph))
+    assert all(mate[mate[v]] == v and graph[v][mate[v]] for v in range(len(graph)) if mate[v] != -1)
+    assert mate.count(-1) == brute_force_unmatched(adjacency(graph)) <= maximum_matching(graph)
+
+if np is not None:
+    bananas = [1, 7, 3, 21, 13, 19, 7, 1]
+    graph = DeadlockGraph(bananas)
+    assert [graph[v] for v in range(len(graph))] == adjacency([[is_dead_lock(x, y) for y in bananas] for x in bananas])
+    assert graph.degrees == [len(graph[v]) for v in range(len(graph))]
+    for _ in range(20):
+        bananas = [rnd.randint(1, rnd.choice([10, 2 ** 30 - 1])) for _ in range(rnd.randint(1, 30))]
+        pairs = [[is_dead_lock(x, y) for y in bananas] for x in bananas]
+        assert solution(bananas) == edmonds_matching(adjacency(pairs)).count(-1)
@@ -0,0 +1,81 @@
+from __future__ import division, print_function
+
+import pickle
+import time
+
+from solution import bunny_keys, bunny_ranges, solution
+
+
+def timed(f, *args):
+    start = time.time()
+    result = f(*args)
+    return result, time.time() - start
+
+
+def peak_memory(f, *args):
+    import tracemalloc
+
+    tracemalloc.start()
+    f(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def stream(num_buns, num_required):
+    # one bunny at a time, as a caller writing each key list out would
+    for bunny in range(num_buns):
+        for _ in bunny_keys(num_buns, num_required, bunny):
+            pass
+
+
+def run(cases=((10, 5), (16, 8), (20, 10), (22, 11))):
+    """
+    peak allocation and time of all key sets per output mode, and of streaming them bunny by bunny.
+    The list output enumerates every combination once for all bunnies, the others walk the blocks of
+    each bunny on its own, which costs more in total but lets a single bunny (or a few) be served
+    without computing the rest.
+    """
+    modes = (
+        ('list', lambda n, r: solution(n, r)),
+        ('array', lambda n, r: solution(n, r, output='array')),
+        ('bitmap', lambda n, r: solution(n, r, output='bitmap')),
+        ('stream', stream),
+    )
+    print('{:>5} {:>9} {:>9} {:>10} {:>10} {:>10}'.format('buns', 'required', 'keys', 'mode', 'peak', 'time'))
+    for num_buns, num_required in cases:
+        keys = len(list(bunny_keys(num_buns, num_required, 0)))
+        for name, f in modes:
+            _, elapsed = timed(f, num_buns, num_required)
+            peak = peak_memory(f, num_buns, num_required)
+            print('{:>5} {:>9} {:>9} {:>10} {:>8.2f}MB {:>9.3f}s'.format(
+                num_buns, num_required, keys, name, peak / 2 ** 20, elapsed
+            ))
+
+
+def run_single(num_buns=24, num_required=12):
+    """time of the keys of single bunnies, against all key sets as lists"""
+    _, t_list = timed(solution, num_buns, num_required)
+    print('{} bunnies, {} required: all lists {:.3f}s'.format(num_buns, num_required, t_list))
+    print('{:>6} {:>10} {:>10} {:>10}'.format('bunny', 'keys', 'ranges', 'time'))
+    for bunny in (0, 1, num_buns // 2, num_buns - 1):
+        ranges, elapsed = timed(lambda: list(bunny_ranges(num_buns, num_required, bunny)))
+        print('{:>6} {:>10} {:>10} {:>9.3f}s'.format(bunny, sum(b - a for a, b in ranges), len(ranges), elapsed))
+
+
+def run_sharded(num_buns=22, num_required=11, workers=(1, 2, 4, 8)):
+    """speedup of sharded_solution by worker count over the serial solution, checking the pickled output is identical"""
+    serial, t_serial = timed(solution, num_buns, num_required)
+    expected = pickle.dumps(serial, 2)
+    print('{} bunnies, {} required: serial {:.3f}s'.format(num_buns, num_required, t_serial))
+    print('{:>8} {:>10} {:>8}'.format('workers', 'time', 'speedup'))
+    for processes in workers:
+        result, elapsed = timed(solution, num_buns, num_required, 'list', processes)
+        assert pickle.dumps(result, 2) == expected
+        print('{:>8} {:>9.3f}s {:>7.2f}x'.format(processes, elapsed, t_serial / elapsed))
+
+
+if __name__ == '__main__':
+    run()
+    run_single()
+    run_sharded()
@@ -1,7 +1,28 @@
+from array import array
 from itertools import combinations
+from multiprocessing import Pool
 
 
-def solution(num_buns, num_required):
+def solution(num_buns, num_required, output='list', processes=None):
+    """
+    arguments:
+    output -- 'list' for lists of ints (all bunnies in one pass over the combinations, see combination_solution,
+              or sharded over `processes`, see sharded_solution),
+              'array' for one array('I') per bunny,
+              'bitmap' for one bytearray per bunny, bit key % 8 of byte key // 8 set for each of its keys
+    """
+    if output == 'list':
+        if processes:
+            return sharded_solution(num_buns, num_required, processes)
+        return combination_solution(num_buns, num_required)
+    if output == 'array':
+        return [bunny_array(num_buns, num_required, bunny) for bunny in range(num_buns)]
+    if output == 'bitmap':
+        return [bunny_bitmap(num_buns, num_required, bunny) for bunny in range(num_buns)]
+    raise ValueError('Invalid output: {}'.format(output))
+
+
+def combination_solution(num_buns, num_required):
     """
     Number of copies per key:
     -------------------------
@@ -42,6 +63,186 @@ def solution(num_buns, num_required):
     return key_sets
 
 
+def binomial(n, k):
+    if k < 0 or k > n:
+        return 0
+    result = 1
+    for i in range(min(k, n - k)):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
+def binomials(n, k):
+    """table[m][j] = binomial(m, j) for m <= n, j <= k"""
+    table = [[1] + [0] * k]
+    for m in range(1, n + 1):
+        previous = table[-1]
+        table.append([1] + [previous[j - 1] + previous[j] for j in range(1, k + 1)])
+    return table
+
+
+def bunny_ranges(num_buns, num_required, bunny):
+    """
+    generator of the keys of `bunny` in increasing order, as half open (start, stop) ranges,
+    without enumerating the keys of the others.
+    The combinations containing `bunny` with the same bunnies p before it share a block of consecutive keys:
+    all their completions after `bunny`, starting at the index of p + (bunny, bunny + 1, ...).
+    Blocks are visited depth first over p in lexicographic order, every extension p + (y,) before p itself
+    as y < bunny, the first key of each block from its parent by prefix sums of the skipped subtrees.
+    I.e. O(1) per block, plus O(num_buns * copies_per_key) for the tables.
+    """
+    n = num_buns
+    k = num_buns - num_required + 1
+    if not 0 < k <= n:
+        return iter(())
+    table = binomials(n, k)
+    # skipped[c][m] is the number of combinations skipped in a position with c bunnies to follow
+    # by starting at bunny m rather than at bunny 0
+    skipped = [[0] * (n + 1) for _ in range(k)]
+    for c in range(k):
+        for m in range(n):
+            skipped[c][m + 1] = skipped[c][m] + table[n - 1 - m][c]
+    after = n - 1 - bunny
+
+    def ranges():
+        # frames [lo, j, base, y]: p ends with lo - 1, has j bunnies, its combinations start at key `base`,
+        # and y is its next extension. Adjacent blocks are merged.
+        stack = [[0, 0, 0, 0]]
+        start = stop = 0
+        while stack:
+            frame = stack[-1]
+            lo, j, base, y = frame
+            c = k - 1 - j
+            # y needs room for enough bunnies before `bunny` that the rest fits after it
+            if j + 1 < k and y < min(bunny, bunny + j + after - k + 2):
+                frame[3] = y + 1
+                stack.append([y + 1, j + 1, base + skipped[c][y] - skipped[c][lo], y + 1])
+                continue
+            stack.pop()
+            if table[after][c]:
+                first = base + skipped[c][bunny] - skipped[c][lo]
+                if first != stop:
+                    if stop:
+                        yield start, stop
+                    start = first
+                stop = first + table[after][c]
+        if stop:
+            yield start, stop
+
+    return ranges()
+
+
+def bunny_keys(num_buns, num_required, bunny):
+    """generator of the keys of `bunny` in increasing order, see bunny_ranges"""
+    for start, stop in bunny_ranges(num_buns, num_required, bunny):
+        for key in range(start, stop):
+            yield key
+
+
+def bunny_array(num_buns, num_required, bunny):
+    keys = array('I')
+    for start, stop in bunny_ranges(num_buns, num_required, bunny):
+        keys.extend(range(start, stop))
+    return keys
+
+
+def bunny_bitmap(num_buns, num_required, bunny):
+    """bytearray with bit key % 8 of byte key // 8 set for each key of `bunny`, whole bytes at a time"""
+    bits = bytearray((binomial(num_buns, num_required - 1) + 7) // 8)
+    for start, stop in bunny_ranges(num_buns, num_required, bunny):
+        head, tail = (start + 7) // 8, stop // 8
+        if head > tail:
+            for key in range(start, stop):
+                bits[key >> 3] |= 1 << (key & 7)
+            continue
+        for key in range(start, 8 * head):
+            bits[key >> 3] |= 1 << (key & 7)
+        bits[head:tail] = b'\xff' * (tail - head)
+        for key in range(8 * tail, stop):
+            bits[key >> 3] |= 1 << (key & 7)
+    return bits
+
+
+def blocks(n, k, start, stop, table=None):
+    """
+    the combinations of combinations(range(n), k) with index in [start, stop), in order, as blocks
+    (prefix, lo, r): prefix + tail for every tail in combinations(range(lo, n), r).
+    Only the paths to the first and the last index are split, i.e. O(n * k) blocks.
+    """
+    table = table or binomials(n, k)
+
+    def split(prefix, lo, r, start, stop):
+        if start <= 0 and stop >= table[n - lo][r]:
+            yield prefix, lo, r
+            return
+        offset = 0
+        for a in range(lo, n - r + 1):
+            size = table[n - 1 - a][r - 1]
+            if offset < stop and offset + size > start:
+                for block in split(prefix + (a,), a + 1, r - 1, start - offset, stop - offset):
+                    yield block
+            offset += size
+            if offset >= stop:
+                break
+
+    return split((), 0, k, start, stop)
+
+
+def shard_keys(task):
+    """
+    key sets of the keys in [start, stop) of a (num_buns, num_required, start, stop) task, as array('I'):
+    the bunnies of a block prefix take the whole block, the rest comes from itertools.combinations
+    """
+    num_buns, num_required, start, stop = task
+    k = num_buns - num_required + 1
+    table = binomials(num_buns, max(k, 0))
+    key_sets = [[] for _ in range(num_buns)]
+    key = start
+    if 0 <= k <= num_buns:
+        for prefix, lo, r in blocks(num_buns, k, start, stop, table):
+            size = table[num_buns - lo][r]
+            for bunny in prefix:
+                key_sets[bunny].extend(range(key, key + size))
+            for key, tail in enumerate(combinations(range(lo, num_buns), r), key):
+                for bunny in tail:
+                    key_sets[bunny].append(key)
+            key += 1
+    return [array('I', keys) for keys in key_sets]
+
+
+def shards(num_buns, num_required, count):
+    """`count` contiguous (num_buns, num_required, start, stop) tasks covering all keys"""
+    total = binomial(num_buns, num_buns - num_required + 1)
+    bounds = [total * i // count for i in range(count + 1)]
+    return [(num_buns, num_required, bounds[i], bounds[i + 1]) for i in range(count)]
+
+
+def merge(sharded_key_sets):
+    """concatenates the key sets of consecutive shards, bunny by bunny, into lists"""
+    key_sets = []
+    for bunny_key_sets in zip(*sharded_key_sets):
+        keys = array('I')
+        for shard in bunny_key_sets:
+            keys.extend(shard)
+        key_sets.append(keys.tolist())
+    return key_sets
+
+
+def sharded_solution(num_buns, num_required, processes, shards_per_process=4):
+    """
+    solution computed by a pool of `processes`: the key index space is cut into contiguous shards,
+    so concatenating the shards in order keeps every key set sorted and free of duplicates.
+    Shards come back as array('I'), which pickle as plain bytes.
+    """
+    tasks = shards(num_buns, num_required, processes * shards_per_process)
+    pool = Pool(processes)
+    try:
+        return merge(pool.map(shard_keys, tasks, 1))
+    finally:
+        pool.close()
+        pool.join()
+
+
 assert solution(2, 1) == [[0], [0]]
 assert solution(4, 4) == [[0], [1], [2], [3]]
 assert solution(5, 3) == [
@@ -52,3 +253,17 @@ assert solution(5, 3) == [
     [2, 4, 5, 7, 8, 9]
 ]
 
+for num_buns in range(1, 10):
+    for num_required in range(0, num_buns + 2):
+        expected = combination_solution(num_buns, num_required)
+        assert [list(bunny_keys(num_buns, num_required, bunny)) for bunny in range(num_buns)] == expected
+        assert [list(keys) for keys in solution(num_buns, num_required, output='array')] == expected
+        assert all(
+            [key for key in range(8 * len(bits)) if bits[key >> 3] >> (key & 7) & 1] == keys
+            for bits, keys in zip(solution(num_buns, num_required, output='bitmap'), expected)
+        )
+
+for num_buns, num_required in ((1, 1), (3, 4), (5, 3), (9, 4), (12, 7), (12, 12)):
+    expected = combination_solution(num_buns, num_required)
+    for count in (1, 2, 5, 100):
+        assert merge(map(shard_keys, shards(num_buns, num_required, count))) == expected
@@ -0,0 +1,129 @@
+from __future__ import print_function
+
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from solution import (
+    CycleIndex, buildFactorialTable, buildGCDTable, cycleIndex, cycleIndexes, cycleIndexPath, cycleTypeStream,
+    partitionsAndCycleCount, solution
+)
+
+
+def timed(f, *args, **kwargs):
+    start = time.time()
+    result = f(*args, **kwargs)
+    return result, time.time() - start
+
+
+def partitionCount(n):
+    return len(partitionsAndCycleCount(n, buildFactorialTable(n)))
+
+
+def run(shapes=((8, 8), (12, 12), (16, 16), (20, 20), (24, 24), (28, 28), (40, 8), (40, 16), (40, 20)),
+        s=2 ** 64 + 13, max_pairs=10 ** 6, workers=(None, 2, 4)):
+    """
+    time of the grouped engine per number of worker processes, and of pairSolution
+    (up to `max_pairs` pairs of cycle types) for large s.
+    w = h = 40 makes 37338^2 pairs, about a quarter of an hour per core.
+    """
+    if hasattr(sys, 'set_int_max_str_digits'):
+        sys.set_int_max_str_digits(0)
+    print('{:>4} {:>4} {:>12} {:>12} {}'.format('w', 'h', 'type pairs', 'pairSolution', ' '.join(
+        '{:>10}'.format('grouped/{}'.format(p or 1)) for p in workers
+    )))
+    for w, h in shapes:
+        pairs = partitionCount(w) * partitionCount(h)
+        results = set()
+        row = []
+        if pairs <= max_pairs:
+            result, elapsed = timed(solution, w, h, s, method='pairs')
+            results.add(result)
+            row.append('{:.3f}s'.format(elapsed))
+        else:
+            row.append('-')
+        for processes in workers:
+            result, elapsed = timed(solution, w, h, s, processes=processes)
+            results.add(result)
+            row.append('{:.3f}s'.format(elapsed))
+        assert len(results) == 1
+        print('{:>4} {:>4} {:>12} {:>12} {}'.format(w, h, pairs, row[0], ' '.join('{:>10}'.format(t) for t in row[1:])))
+
+
+def peakMemory(f, *args, **kwargs):
+    import tracemalloc
+
+    tracemalloc.start()
+    f(*args, **kwargs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def consume(iterable):
+    for _ in iterable:
+        pass
+
+
+def runMemory(sizes=(20, 40, 60), shapes=((40, 8), (50, 4))):
+    """
+    peak allocation and time of enumerating the partitions of n as the list of partitionsAndCycleCount
+    (plus the n^2 gcd table) against cycleTypeStream, and of a whole solution call per method
+    """
+    print('{:>4} {:>10} {:>10} {:>10} {:>10} {:>10}'.format('n', 'types', 'list', 'peak', 'stream', 'peak'))
+    for n in sizes:
+        factorialTable = buildFactorialTable(n)
+        types, t_list = timed(lambda: (buildGCDTable(n), partitionsAndCycleCount(n, factorialTable))[1])
+        peak_list = peakMemory(lambda: (buildGCDTable(n), partitionsAndCycleCount(n, factorialTable)))
+        _, t_stream = timed(consume, cycleTypeStream(n, factorialTable))
+        peak_stream = peakMemory(consume, cycleTypeStream(n, factorialTable))
+        print('{:>4} {:>10} {:>9.3f}s {:>8.1f}MB {:>9.3f}s {:>8.1f}MB'.format(
+            n, len(types), t_list, peak_list / 2 ** 20, t_stream, peak_stream / 2 ** 20
+        ))
+
+    print('{:>4} {:>4} {:>10} {:>10}'.format('w', 'h', 'pairs', 'grouped'))
+    for w, h in shapes:
+        peaks = [peakMemory(solution, w, h, 3, method=method) for method in ('pairs', 'grouped')]
+        print('{:>4} {:>4} {:>8.1f}MB {:>8.1f}MB'.format(w, h, *[peak / 2 ** 20 for peak in peaks]))
+
+
+def runSweep(shapes=((8, 8), (12, 12), (16, 16), (20, 20), (40, 8)), count=1000, maxSolutions=50, p=10 ** 9 + 7):
+    """
+    sweep of `count` random s < 2^64 per grid shape: repeated solution calls (timed for
+    the first `maxSolutions` values and extrapolated) against one cycle index built,
+    saved and loaded once and then evaluated exactly and mod p
+    """
+    if hasattr(sys, 'set_int_max_str_digits'):
+        sys.set_int_max_str_digits(0)
+    rnd = random.Random(0)
+    directory = tempfile.mkdtemp()
+    print('{:>4} {:>4} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+        'w', 'h', 'solution', 'build', 'load', 'exact', 'mod p'
+    ))
+    try:
+        for w, h in shapes:
+            values = [rnd.randrange(1, 2 ** 64) for _ in range(count)]
+            sample = values[:maxSolutions]
+            expected, t_solution = timed(lambda: [int(solution(w, h, s)) for s in sample])
+
+            cycleIndexes.clear()
+            _, t_build = timed(cycleIndex, w, h, directory)
+            index, t_load = timed(CycleIndex.load, cycleIndexPath(w, h, directory))
+            exact, t_exact = timed(index.evaluate, values)
+            residues, t_mod = timed(index.evaluate, values, p)
+            assert exact[:maxSolutions] == expected
+            assert residues == [e % p for e in exact]
+
+            print('{:>4} {:>4} {:>9.3f}s {:>9.3f}s {:>9.3f}s {:>9.3f}s {:>9.3f}s'.format(
+                w, h, t_solution * count / len(sample), t_build, t_load, t_exact, t_mod
+            ))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    run()
+    runMemory()
+    runSweep()
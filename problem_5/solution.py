@@ -1,4 +1,13 @@
+import json
+import os
 from collections import Counter
+from itertools import islice
+from multiprocessing import Pool
+
+try:
+    from math import gcd as euclid
+except ImportError:
+    from fractions import gcd as euclid
 
 
 def buildGCDTable(n):
@@ -104,7 +113,22 @@ def partitionsAndCycleCount(n, factorialTable):
     return result
 
 
-def solution(w, h, s):
+def solution(w, h, s, method='grouped', processes=None):
+    """
+    method -- 'grouped' for groupedSolution, optionally over a pool of `processes`,
+              'index' for the cycle index of (w, h), built once (see cycleIndex),
+              'pairs' for pairSolution
+    """
+    if method == 'grouped':
+        return groupedSolution(w, h, s, processes)
+    if method == 'index':
+        return str(cycleIndex(w, h, processes=processes)(s))
+    if method == 'pairs':
+        return pairSolution(w, h, s)
+    raise ValueError('Invalid method: {}'.format(method))
+
+
+def pairSolution(w, h, s):
     # We are going to need the gcd for all pairs of numbers (a,b)
     # with a<= w and b <= h. So, let's compute them all.
     n = max(w, h)
@@ -127,4 +151,229 @@ def solution(w, h, s):
         for cph in partitionsAndCycleCount(h, factorialTable):
             m = cpw[1] * cph[1]
             grid += m * (s ** sum([sum([gcd(i, j, gcdTable) for i in cpw[0]]) for j in cph[0]]))
-    return str(grid // (factorial(w, factorialTable) * factorial(h, factorialTable)))
\ No newline at end of file
+    return str(grid // (factorial(w, factorialTable) * factorial(h, factorialTable)))
+
+
+def cycleTypes(n, factorialTable):
+    """
+    The cycle types of S_n as multiplicity vectors, i.e. ((part, multiplicity), ...)
+    for a partition with multiplicity 1s, 2s, ..., together with the number of
+    permutations of that cycle type (see partitionsAndCycleCount).
+    """
+    return [(tuple(sorted(Counter(p).items())), c) for p, c in partitionsAndCycleCount(n, factorialTable)]
+
+
+def cycleTypeStream(n, factorialTable):
+    """
+    Generator of the same cycle types as cycleTypes, one at a time, without building
+    the list of all partitions. Parts are chosen from the largest down, multiplicity
+    by multiplicity, and the denominator 1^{i_1}i_1!2^{i_2}i_2!... of the count is
+    carried along, so every cycle type costs one division.
+    """
+    nFactorial = factorial(n, factorialTable)
+    prefix = []
+
+    def types(remaining, largest, denominator):
+        if remaining == 0:
+            yield tuple(prefix[::-1]), nFactorial // denominator
+            return
+        for a in range(min(largest, remaining), 0, -1):
+            power = 1
+            for m in range(1, remaining // a + 1):
+                power *= a
+                prefix.append((a, m))
+                for cycleType in types(remaining - a * m, a - 1, denominator * power * factorial(m, factorialTable)):
+                    yield cycleType
+                prefix.pop()
+
+    return types(n, n, 1)
+
+
+gcdCache = {}
+
+
+def cachedGCD(a, b):
+    """
+    gcd of two part sizes, memoized. Only the pairs of part sizes that actually
+    occur are ever computed, instead of a full max(w, h)^2 table.
+    """
+    key = (a, b) if a <= b else (b, a)
+    if key not in gcdCache:
+        gcdCache[key] = euclid(a, b)
+    return gcdCache[key]
+
+
+def exponentTerms(task):
+    """
+    Groups the pairs of a chunk of cycle types of S_w with all the cycle types of
+    S_h by the number of cycles of the pair acting on the grid, i.e. by the exponent of s.
+    A cycle of length a and a cycle of length b make gcd(a, b) cycles on the grid, so
+    for every cycle type of S_w we first sum up the cycles it makes with a single cycle
+    of length b, for all b <= h. The exponent of a pair is then a short sum over the
+    distinct parts of the h cycle type.
+    Returns a dict exponent -> sum of the products of the permutation counts.
+    """
+    wTypes, hTypes, h = task
+    terms = {}
+    for wType, wCount in wTypes:
+        row = [0] + [sum(m * cachedGCD(a, b) for a, m in wType) for b in range(1, h + 1)]
+        inner = {}
+        for hType, hCount in hTypes:
+            e = 0
+            for b, m in hType:
+                e += m * row[b]
+            inner[e] = inner.get(e, 0) + hCount
+        for e, c in inner.items():
+            terms[e] = terms.get(e, 0) + wCount * c
+    return terms
+
+
+def powerSum(terms, s):
+    """
+    Sum of c * s^e over the terms e -> c. The exponents are visited in increasing order,
+    every power of s is the previous one times s^(difference of the exponents), and
+    those (small) powers are cached.
+    """
+    total = 0
+    power = 1
+    previous = 0
+    steps = {}
+    for e in sorted(terms):
+        if e - previous not in steps:
+            steps[e - previous] = s ** (e - previous)
+        power *= steps[e - previous]
+        previous = e
+        total += terms[e] * power
+    return total
+
+
+def cycleIndexTerms(w, h, processes=None, chunkSize=2000):
+    """
+    The cycle index polynomial of S_w x S_h acting on the grid, times w!h!, as a dict
+    exponent -> integer coefficient (see exponentTerms). The cycle types of the larger
+    side make the outer loop and are streamed (see cycleTypeStream), only the ones of
+    the smaller side are kept. With `processes`, chunks of `chunkSize` outer cycle types
+    go to a pool as they are generated.
+    """
+    if h > w:
+        w, h = h, w
+    factorialTable = buildFactorialTable(w)
+    hTypes = list(cycleTypeStream(h, factorialTable))
+    if processes:
+        wTypes = cycleTypeStream(w, factorialTable)
+        chunks = iter(lambda: list(islice(wTypes, chunkSize)), [])
+        pool = Pool(processes)
+        try:
+            results = list(pool.imap_unordered(exponentTerms, ((chunk, hTypes, h) for chunk in chunks)))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [exponentTerms((cycleTypeStream(w, factorialTable), hTypes, h))]
+    terms = {}
+    for result in results:
+        for e, c in result.items():
+            terms[e] = terms.get(e, 0) + c
+    return terms
+
+
+def groupedSolution(w, h, s, processes=None, chunkSize=2000):
+    """
+    Same count as pairSolution, with the pairs of cycle types grouped by their exponent
+    (see cycleIndexTerms), so every power of s is computed once.
+    """
+    factorialTable = buildFactorialTable(max(w, h))
+    terms = cycleIndexTerms(w, h, processes, chunkSize)
+    return str(powerSum(terms, s) // (factorial(w, factorialTable) * factorial(h, factorialTable)))
+
+
+class CycleIndex(object):
+    """
+    The cycle index polynomial of S_w x S_h acting on the grid, built once per grid
+    shape and evaluated for any number of states s. The coefficients are kept as
+    integers over the common denominator w!h!, as a dict exponent -> coefficient.
+    """
+
+    def __init__(self, w, h, terms=None, processes=None):
+        self.w, self.h = max(w, h), min(w, h)
+        self.terms = cycleIndexTerms(w, h, processes) if terms is None else terms
+        factorialTable = buildFactorialTable(self.w)
+        self.denominator = factorial(self.w, factorialTable) * factorial(self.h, factorialTable)
+        exponents = sorted(self.terms, reverse=True)
+        self.coefficients = [self.terms[e] for e in exponents]
+        self.gaps = [a - b for a, b in zip(exponents, exponents[1:] + [0])]
+
+    def __call__(self, s, p=None):
+        """
+        The number of grids with s states up to row and column permutations, or its residue mod p.
+        Horner's scheme from the highest exponent down, i.e. one multiplication by s^gap per term,
+        with the power computed once per distinct gap between consecutive exponents.
+        Mod p, the sum is taken mod p * w!h!: it is a multiple of w!h!, so is its residue, and
+        dividing that residue by w!h! gives the result mod p, for any p.
+        """
+        modulus = None if p is None else p * self.denominator
+        steps = {}
+        total = 0
+        for c, gap in zip(self.coefficients, self.gaps):
+            if gap not in steps:
+                steps[gap] = s ** gap if modulus is None else pow(s, gap, modulus)
+            total = (total + c) * steps[gap]
+            if modulus is not None:
+                total %= modulus
+        return total // self.denominator
+
+    def evaluate(self, values, p=None):
+        return [self(s, p) for s in values]
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'w': self.w, 'h': self.h, 'terms': sorted(self.terms.items())}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data['w'], data['h'], terms=dict((e, c) for e, c in data['terms']))
+
+
+cycleIndexes = {}
+
+
+def cycleIndexPath(w, h, directory):
+    return os.path.join(directory, 'cycleIndex_{}x{}.json'.format(max(w, h), min(w, h)))
+
+
+def cycleIndex(w, h, directory=None, processes=None):
+    """
+    The CycleIndex of (w, h), memoized per shape. With `directory`, it is read from
+    the file of its shape there (see cycleIndexPath) if present, and written there
+    once built otherwise.
+    """
+    key = (max(w, h), min(w, h))
+    if key not in cycleIndexes:
+        path = None if directory is None else cycleIndexPath(w, h, directory)
+        if path is not None and os.path.exists(path):
+            cycleIndexes[key] = CycleIndex.load(path)
+        else:
+            cycleIndexes[key] = CycleIndex(w, h, processes=processes)
+            if path is not None:
+                cycleIndexes[key].save(path)
+    return cycleIndexes[key]
+
+
+assert solution(2, 3, 4) == '430'
+assert solution(2, 2, 2) == '7'
+for w in range(1, 8):
+    for h in range(1, 8):
+        assert solution(w, h, 5) == solution(w, h, 5, method='pairs')
+for n in range(1, 15):
+    factorialTable = buildFactorialTable(n)
+    assert sorted(cycleTypeStream(n, factorialTable)) == sorted(cycleTypes(n, factorialTable))
+assert solution(2, 3, 4, method='index') == '430'
+for w in range(1, 8):
+    for h in range(1, 8):
+        index = cycleIndex(w, h)
+        expected = [int(solution(w, h, s)) for s in range(1, 10)]
+        assert index.evaluate(range(1, 10)) == expected
+        assert index.evaluate(range(1, 10), p=7) == [e % 7 for e in expected]
+        assert index.evaluate(range(1, 10), p=2 ** 61 - 1) == [e % (2 ** 61 - 1) for e in expected]
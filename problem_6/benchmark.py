@@ -0,0 +1,57 @@
+from __future__ import division, print_function
+
+import random
+import time
+
+from solution import BeattySums, batch_solution, solution, unparse
+
+
+def timed(f, *args, **kwargs):
+    start = time.time()
+    result = f(*args, **kwargs)
+    return result, time.time() - start
+
+
+def run(sizes=(10, 50, 100, 300, 1000, 3000, 10000), max_decimal=100):
+    """time of both methods for random n of `sizes` digits, the decimal one (and the cross-check) up to `max_decimal`"""
+    rnd = random.Random(0)
+    print('{:>8} {:>10} {:>10}'.format('digits', 'integer', 'decimal'))
+    for digits in sizes:
+        n = unparse(rnd.randint(10 ** (digits - 1), 10 ** digits - 1))
+        result, t_integer = timed(solution, n)
+        t_decimal = '-'
+        if digits <= max_decimal:
+            decimal, elapsed = timed(solution, n, method='decimal')
+            assert decimal == result
+            t_decimal = '{:.5f}s'.format(elapsed)
+        print('{:>8} {:>9.5f}s {:>10}'.format(digits, t_integer, t_decimal))
+
+
+def run_batch(count=10 ** 5, digits=100, capacities=(0, 1 << 12, 1 << 16)):
+    """
+    per query latency of `count` sorted `digits` digit values with one solution call each and with
+    batch_solution per LRU capacity, for random values and for a sliding window of consecutive ones
+    """
+    rnd = random.Random(0)
+    start = rnd.randint(10 ** (digits - 1), 10 ** digits - 1)
+    batches = (
+        ('random', sorted(rnd.randint(10 ** (digits - 1), 10 ** digits - 1) for _ in range(count))),
+        ('window', list(range(start, start + count))),
+    )
+    print('{} values of {} digits'.format(count, digits))
+    print('{:>8} {:>10} {:>12} {:>10}'.format('batch', 'capacity', 'per query', 'hit rate'))
+    for name, values in batches:
+        expected, elapsed = timed(lambda: [solution(n) for n in values])
+        print('{:>8} {:>10} {:>10.2f}us {:>10}'.format(name, '-', elapsed / count * 1e6, '-'))
+        for capacity in capacities:
+            sums = BeattySums(capacity)
+            result, elapsed = timed(batch_solution, values, sums)
+            assert result == expected
+            print('{:>8} {:>10} {:>10.2f}us {:>10.1%}'.format(
+                name, capacity, elapsed / count * 1e6, sums.cache.hits / max(1, sums.cache.hits + sums.cache.misses)
+            ))
+
+
+if __name__ == '__main__':
+    run()
+    run_batch()
@@ -1,7 +1,78 @@
+import random
+from collections import OrderedDict
 from decimal import Decimal, localcontext
 
+try:
+    from math import isqrt
+except ImportError:
+    def isqrt(n):
+        """floor of the square root of n by Newton's method, for Pythons without math.isqrt"""
+        if n < 2:
+            return n
+        x = 1 << ((n.bit_length() + 1) // 2)
+        while True:
+            y = (x + n // x) // 2
+            if y >= x:
+                return x
+            x = y
 
-def solution(s):
+
+def parse(digits, cutoff=1000):
+    """
+    parse converts a decimal string to int in sub-quadratic time (int(str) is quadratic and
+    limited to 4300 digits on recent Pythons), by splitting the string in halves:
+        int(high + low) = int(high) * 10^len(low) + int(low)
+    """
+    powers = {}
+
+    def convert(s):
+        if len(s) <= cutoff:
+            return int(s)
+        half = len(s) // 2
+        if half not in powers:
+            powers[half] = 10 ** half
+        return convert(s[:-half]) * powers[half] + convert(s[-half:])
+
+    return convert(digits.strip())
+
+
+def unparse(n, cutoff=1000):
+    """
+    unparse is the reverse of parse: the decimal string of a non-negative int, without the
+    4300 digit limit of str(int), by splitting at the powers 10^(cutoff * 2^k):
+        str(n) = str(n // 10^k) + str(n % 10^k), the latter padded with zeros to k digits
+    Negative ints get a leading '-'.
+    """
+    if n < 0:
+        return '-' + unparse(-n, cutoff)
+    powers = [10 ** cutoff]
+    while powers[-1] * powers[-1] <= n:
+        powers.append(powers[-1] * powers[-1])
+
+    def convert(n, k, padded):
+        if k < 0:
+            return str(n).zfill(cutoff) if padded else str(n)
+        high, low = divmod(n, powers[k])
+        if not high and not padded:
+            return convert(low, k - 1, False)
+        return convert(high, k - 1, padded) + convert(low, k - 1, True)
+
+    return convert(n, len(powers) - 1, False)
+
+
+def solution(s, method='integer'):
+    """
+    method -- 'integer' for integer_solution, exact for any size of s,
+              'decimal' for decimal_solution, exact up to about 10^100
+    """
+    if method == 'integer':
+        return integer_solution(s)
+    if method == 'decimal':
+        return decimal_solution(s)
+    raise ValueError('Invalid method: {}'.format(method))
+
+
+def decimal_solution(s):
     n = Decimal(s)
     with localcontext() as ctx:
         ctx.prec = 102
@@ -14,7 +85,154 @@ def solution(s):
             Brn = int(r * n)
             Brns = int(Decimal(Brn) / s)
 
-            return (Brn * (Brn + 1)) / 2 - solve(Brns) - Brns * (Brns + 1)
+            return (Brn * (Brn + 1)) // 2 - solve(Brns) - Brns * (Brns + 1)
 
         return str(int(solve(n)))
 
+
+def integer_solution(s):
+    """
+    decimal_solution in integers only, as a loop.
+    floor(n * sqrt(2)) = isqrt(2 * n^2), and with Brn = floor(n * sqrt(2)) < n * sqrt(2) < Brn + 1
+    the reduction floor(Brn / (2 + sqrt(2))) = Brn - ceil(Brn / sqrt(2)) is Brn - n.
+    Every step adds its terms with alternating sign until n reaches 0.
+    As n shrinks by a factor sqrt(2) - 1 per step, i.e. 1.27 bits, a d digit n takes about 2.6 * d steps.
+    """
+    n = parse(s) if isinstance(s, str) else int(s)
+    total = 0
+    sign = 1
+    while n:
+        Brn = isqrt(2 * n * n)
+        Brns = Brn - n
+        total += sign * (Brn * (Brn + 1) // 2 - Brns * (Brns + 1))
+        sign = -sign
+        n = Brns
+    return unparse(total)
+
+
+class LRUCache(object):
+    """
+    LRUCache is a dict of at most `capacity` entries, evicting the least recently used one.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        if key not in self.data:
+            self.misses += 1
+            return default
+        self.hits += 1
+        value = self.data.pop(key)
+        self.data[key] = value
+        return value
+
+    def put(self, key, value):
+        self.data.pop(key, None)
+        self.data[key] = value
+        if len(self.data) > self.capacity:
+            self.data.popitem(last=False)
+
+
+class BeattySums(object):
+    """
+    BeattySums evaluates integer_solution for many n, sharing between the queries:
+    - sqrt(2) as integers roots[i] = floor(sqrt(2) * 2^(64 * i)), extended to the largest n seen so far.
+      floor(n * sqrt(2)) is then a product and a shift at 64 bits more than n has, and only needs
+      the exact isqrt test if the dropped bits are within n of a carry, i.e. hardly ever
+    - an LRUCache of S over the values the reduction chains pass, so nearby n (sliding windows,
+      both ends of a range) stop as soon as their chain reaches a value seen before
+    """
+
+    def __init__(self, capacity=1 << 16):
+        self.roots = [1]
+        self.cache = LRUCache(capacity)
+
+    def extend(self, n):
+        # roots up to 64 bits more than twice the bits of n, so that they last for a while
+        if (n.bit_length() >> 6) + 1 >= len(self.roots):
+            top = 2 * (n.bit_length() >> 6) + 2
+            root = isqrt(2 << (128 * top))
+            self.roots = [root >> (64 * (top - j)) for j in range(top + 1)]
+
+    def floor_root(self, n):
+        """floor(n * sqrt(2))"""
+        self.extend(n)
+        i = (n.bit_length() >> 6) + 1
+        q = n * self.roots[i]
+        m = q >> (64 * i)
+        # the exact product n * sqrt(2) * 2^(64 * i) lies in [q, q + n)
+        if (q + n) >> (64 * i) != m and (m + 1) * (m + 1) <= 2 * n * n:
+            m += 1
+        return m
+
+    def __call__(self, n):
+        """S(n) = sum of floor(i * sqrt(2)) for 1 <= i <= n"""
+        self.extend(n)
+        roots = self.roots
+        cache = self.cache if self.cache.capacity else None
+        path = []
+        total = 0
+        while n:
+            if cache is not None:
+                known = cache.get(n)
+                if known is not None:
+                    total = known
+                    break
+            # floor_root, inlined
+            i = (n.bit_length() >> 6) + 1
+            q = n * roots[i]
+            Brn = q >> (64 * i)
+            if (q + n) >> (64 * i) != Brn and (Brn + 1) * (Brn + 1) <= 2 * n * n:
+                Brn += 1
+            Brns = Brn - n
+            path.append((n, (Brn * (Brn + 1) >> 1) - Brns * (Brns + 1)))
+            n = Brns
+        for n, terms in reversed(path):
+            total = terms - total
+            if cache is not None:
+                cache.put(n, total)
+        return total
+
+
+def batch_solution(values, sums=None):
+    """
+    solution for every value of `values`, best sorted (nearby values share most of their reduction chain)
+
+    arguments:
+    sums -- BeattySums to share with earlier or later batches, BeattySums(capacity=0) for unrelated
+            values: their chains only meet close to 0, where the steps are cheap anyway
+    """
+    sums = sums or BeattySums()
+    return [unparse(sums(parse(n) if isinstance(n, str) else int(n))) for n in values]
+
+
+def range_solution(a, b, sums=None):
+    """sum of floor(i * sqrt(2)) for a < i <= b, i.e. S(b) - S(a)"""
+    sums = sums or BeattySums()
+    a, b = (parse(n) if isinstance(n, str) else int(n) for n in (a, b))
+    return unparse(sums(b) - sums(a))
+
+
+assert solution('77') == solution('77', method='decimal') == '4208'
+assert solution('5') == solution('5', method='decimal') == '19'
+assert [int(solution(n)) for n in range(1, 200)] == [
+    sum(isqrt(2 * i * i) for i in range(1, n + 1)) for n in range(1, 200)
+]
+rnd = random.Random(0)
+for digits in range(1, 101):
+    n = str(rnd.randint(10 ** (digits - 1), 10 ** digits - 1))
+    assert solution(n) == solution(n, method='decimal')
+for n in (0, 9, -5, -10 ** 100, 10, 10 ** 100 - 1, 10 ** 100, 10 ** 250 + 7, 3 ** 900):
+    assert unparse(n, cutoff=20) == str(n).rstrip('L') and parse(unparse(n, cutoff=20), cutoff=20) == n
+assert unparse(10 ** 5000) == '1' + '0' * 5000 and parse(unparse(3 ** 20000)) == 3 ** 20000
+
+sums = BeattySums(capacity=64)
+values = sorted(rnd.randint(1, 10 ** rnd.randint(1, 300)) for _ in range(300))
+assert batch_solution(values, sums) == [solution(n) for n in values] and sums.cache.hits
+assert batch_solution(range(1000, 1200), sums) == [solution(n) for n in range(1000, 1200)]
+assert range_solution(5, 3) == '-12' and range_solution(3, 5) == '12'
+assert range_solution(10 ** 40, 10 ** 40 + 17) == str(sum(isqrt(2 * i * i) for i in range(10 ** 40 + 1, 10 ** 40 + 18)))